@@ -0,0 +1,577 @@
+#!/usr/bin/env python3
+"""
+Worker de transcrição persistente para modelos NeMo (NVIDIA Parakeet).
+
+Carrega o modelo uma única vez por processo e atende jobs de transcrição
+através de uma fila. A memória é controlada com limpeza explícita após cada
+job; o modelo só é recarregado quando o crescimento de memória medido passa
+do limite configurado.
+
+Os chunks são agrupados em batches por BatchScheduler, que dimensiona o batch
+a partir da memória disponível, reduz o batch e tenta de novo em caso de OOM e
+lembra o maior batch que funcionou para cada modelo/dispositivo.
+
+Em máquinas sem GPU, ASRProcessPool distribui os chunks entre processos, cada
+um com o seu modelo e um número fixo de threads do PyTorch.
+
+Uso:
+    worker = get_asr_worker("nvidia/parakeet-tdt-0.6b-v3")
+    textos = [h.text for h in BatchScheduler(worker).transcribe(chunk_paths)]
+"""
+
+import atexit
+import gc
+import json
+import multiprocessing
+import os
+import queue
+import re
+import sys
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable
+
+from pipeline_metrics import PipelineMetrics, measure
+
+DEFAULT_MODEL = "nvidia/parakeet-tdt-0.6b-v3"
+DEFAULT_RELOAD_THRESHOLD_MB = 2048.0
+
+# Estimativa de memória de ativação por segundo de áudio em um batch
+DEFAULT_MB_PER_AUDIO_SECOND = 8.0
+# Fração da memória livre que o batch pode ocupar
+MEMORY_SAFETY_FACTOR = 0.7
+MAX_AUTO_BATCH_SIZE = 32
+BATCH_SIZE_CACHE_PATH = Path.home() / ".cache" / "agent-youtube" / "batch_sizes.json"
+# Mensagens de falta de memória do CUDA e do alocador de CPU do PyTorch
+OOM_PATTERN = re.compile(r"out of memory|not enough memory|can't allocate memory", re.IGNORECASE)
+
+# Sentinela usada para encerrar a thread do worker
+_STOP = object()
+
+
+def load_nemo_model(model_name: str, device: str):
+    """Carrega um modelo ASR do NeMo no dispositivo indicado ('cuda' ou 'cpu')."""
+    import nemo.collections.asr as nemo_asr
+
+    asr_model = nemo_asr.models.ASRModel.from_pretrained(model_name=model_name)
+    if device == "cuda":
+        asr_model = asr_model.cuda()
+    asr_model.eval()
+    return asr_model
+
+
+def detect_device() -> str:
+    """Retorna 'cuda' se houver GPU disponível, senão 'cpu'."""
+    try:
+        import torch
+    except ImportError:
+        return "cpu"
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def get_memory_usage_mb(device: str = "cpu") -> float:
+    """
+    Retorna o uso de memória atual do processo em MB.
+
+    Usa o RSS de /proc/self/statm quando disponível (Linux) e, em outros
+    sistemas, o pico de RSS reportado por getrusage. Em GPU soma a VRAM
+    alocada pelo PyTorch.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            rss_pages = int(f.read().split()[1])
+        usage = rss_pages * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError, IndexError):
+        import resource
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss é em bytes no macOS e em KB no Linux
+        usage = max_rss / 1e6 if sys.platform == "darwin" else max_rss / 1e3
+
+    if device == "cuda":
+        import torch
+        usage += torch.cuda.memory_allocated() / 1e6
+
+    return usage
+
+
+def get_available_memory_mb(device: str = "cpu", ram_budget_mb: float = None) -> float:
+    """
+    Retorna a memória disponível para batches em MB.
+
+    Em GPU usa a VRAM livre reportada pelo driver. Em CPU usa o orçamento de
+    RAM configurado ou, na falta dele, o MemAvailable de /proc/meminfo.
+    """
+    if device == "cuda":
+        import torch
+        free_bytes, _ = torch.cuda.mem_get_info()
+        return free_bytes / 1e6
+
+    if ram_budget_mb is not None:
+        return ram_budget_mb
+
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1e3
+    except OSError:
+        pass
+    return 4096.0
+
+
+def get_device_name(device: str) -> str:
+    """Nome do dispositivo usado como chave do cache de batch size."""
+    if device == "cuda":
+        import torch
+        return torch.cuda.get_device_name(0)
+    return "cpu"
+
+
+def is_oom_error(error: BaseException) -> bool:
+    """Indica se a exceção é falta de memória (RAM ou VRAM)."""
+    if isinstance(error, MemoryError):
+        return True
+    return isinstance(error, RuntimeError) and OOM_PATTERN.search(str(error)) is not None
+
+
+class ASRWorker:
+    """
+    Worker de longa duração que mantém um modelo ASR carregado.
+
+    Os jobs são enfileirados com submit() e processados em ordem por uma
+    única thread, que é a dona do modelo. Qualquer objeto com um método
+    transcribe(list, **kwargs) serve como modelo, o que permite usar um
+    modelo stub em testes através de model_loader.
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL,
+        device: str = None,
+        model_loader: Callable = None,
+        reload_threshold_mb: float = DEFAULT_RELOAD_THRESHOLD_MB,
+        max_queue_size: int = 0
+    ):
+        """
+        Args:
+            model_name: Nome do modelo a carregar
+            device: 'cuda' ou 'cpu' (auto-detectado se None)
+            model_loader: Função (model_name, device) -> modelo (padrão: NeMo)
+            reload_threshold_mb: Crescimento de memória, em MB, acima do qual
+                o modelo é recarregado
+            max_queue_size: Tamanho máximo da fila de jobs (0 = ilimitada)
+        """
+        self.model_name = model_name
+        self.device = device or detect_device()
+        self.model_loader = model_loader or load_nemo_model
+        self.reload_threshold_mb = reload_threshold_mb
+
+        self.model = None
+        # Métricas da execução atual (model_load, inference, cleanup), se houver
+        self.metrics: PipelineMetrics = None
+        self.load_count = 0
+        self.job_count = 0
+        self._baseline_mb = None
+        self._jobs = queue.Queue(maxsize=max_queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self) -> "ASRWorker":
+        """Inicia a thread do worker (idempotente)."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name=f"asr-worker-{self.model_name}",
+                    daemon=True
+                )
+                self._thread.start()
+        return self
+
+    def submit(self, audio: list, **kwargs) -> Future:
+        """
+        Enfileira um job de transcrição.
+
+        Args:
+            audio: Lista de entradas aceitas por model.transcribe (caminhos)
+            **kwargs: Argumentos extras repassados para model.transcribe
+
+        Returns:
+            Future com a lista de hipóteses retornada pelo modelo
+        """
+        self.start()
+        future = Future()
+        self._jobs.put((future, list(audio), kwargs))
+        return future
+
+    def transcribe(self, audio: list, **kwargs) -> list:
+        """Versão síncrona de submit()."""
+        return self.submit(audio, **kwargs).result()
+
+    def stop(self, timeout: float = None):
+        """Encerra a thread do worker e libera o modelo."""
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            self._jobs.put(_STOP)
+            thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is _STOP:
+                self._unload_model()
+                return
+
+            future, audio, kwargs = job
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            metrics = self.metrics
+            outputs = error = None
+            try:
+                if self.model is None:
+                    with measure(metrics, "model_load"):
+                        self._load_model()
+                with measure(metrics, "inference"):
+                    outputs = self.model.transcribe(audio, **kwargs)
+            except BaseException as e:
+                error = e
+
+            self.job_count += 1
+            with measure(metrics, "cleanup"):
+                self._cleanup()
+            self._check_memory()
+
+            # Resultado só depois da limpeza, para que as métricas do job estejam completas
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(outputs)
+
+    def _load_model(self):
+        self.model = self.model_loader(self.model_name, self.device)
+        self.load_count += 1
+        self._cleanup()
+        self._baseline_mb = get_memory_usage_mb(self.device)
+
+    def _unload_model(self):
+        self.model = None
+        self._baseline_mb = None
+        self._cleanup()
+
+    def _cleanup(self):
+        """Limpeza explícita após cada job, no lugar de recarregar o modelo."""
+        gc.collect()
+        if self.device == "cuda":
+            import torch
+            torch.cuda.synchronize()
+            torch.cuda.empty_cache()
+
+    def _check_memory(self):
+        """Recarrega o modelo se a memória cresceu além do limite."""
+        if self.model is None or self._baseline_mb is None:
+            return
+
+        growth = get_memory_usage_mb(self.device) - self._baseline_mb
+        if growth > self.reload_threshold_mb:
+            print(f"Memória cresceu {growth:.0f} MB desde o carregamento, recarregando modelo...")
+            self._unload_model()
+            self._load_model()
+
+
+_workers = {}
+_workers_lock = threading.Lock()
+
+
+def get_asr_worker(
+    model_name: str = DEFAULT_MODEL,
+    device: str = None,
+    model_loader: Callable = None,
+    reload_threshold_mb: float = DEFAULT_RELOAD_THRESHOLD_MB
+) -> ASRWorker:
+    """
+    Retorna o worker compartilhado do processo para o modelo/dispositivo.
+
+    O worker é criado na primeira chamada e reutilizado nas seguintes, de
+    modo que o modelo é carregado uma única vez por processo.
+    """
+    device = device or detect_device()
+    key = (model_name, device, model_loader)
+
+    with _workers_lock:
+        worker = _workers.get(key)
+        if worker is None:
+            worker = ASRWorker(
+                model_name=model_name,
+                device=device,
+                model_loader=model_loader,
+                reload_threshold_mb=reload_threshold_mb
+            )
+            _workers[key] = worker
+    return worker.start()
+
+
+class TranscriptionResult:
+    """Hipótese simplificada (text/timestamp) devolvida pelos processos do pool."""
+
+    def __init__(self, text: str, timestamp: dict = None):
+        self.text = text
+        self.timestamp = timestamp
+
+
+# Modelo carregado em cada processo do ASRProcessPool
+_process_model = None
+
+
+def _init_process_worker(model_name: str, model_loader: Callable, num_threads: int):
+    global _process_model
+    try:
+        import torch
+    except ImportError:
+        pass
+    else:
+        # Limitar as threads por processo evita oversubscription dos núcleos
+        torch.set_num_threads(num_threads)
+    _process_model = (model_loader or load_nemo_model)(model_name, "cpu")
+
+
+def _transcribe_in_process(audio, kwargs: dict) -> TranscriptionResult:
+    output = _process_model.transcribe([audio], **kwargs)[0]
+    timestamp = getattr(output, "timestamp", None)
+    if isinstance(timestamp, dict):
+        # Só as palavras: os demais campos podem conter tensores
+        timestamp = {"word": [
+            {key: word[key] for key in ("word", "start", "end") if key in word}
+            for word in timestamp.get("word") or []
+        ]}
+    else:
+        timestamp = None
+    return TranscriptionResult(output.text, timestamp)
+
+
+class ASRProcessPool:
+    """
+    Pool de processos para transcrição em CPU, com um modelo por processo.
+
+    Tem a mesma interface de transcrição do ASRWorker (transcribe, model_name,
+    device), então pode ser usado no lugar dele com BatchScheduler. Cada
+    chunk de um batch vai para um processo e os resultados voltam na ordem.
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL,
+        workers: int = None,
+        threads_per_worker: int = None,
+        model_loader: Callable = None
+    ):
+        """
+        Args:
+            model_name: Nome do modelo a carregar em cada processo
+            workers: Número de processos (padrão: núcleos / 4)
+            threads_per_worker: Threads do PyTorch por processo (padrão:
+                núcleos / workers)
+            model_loader: Função (model_name, device) -> modelo; precisa ser
+                importável pelos processos filhos (definida em nível de módulo)
+        """
+        cpu_count = os.cpu_count() or 1
+        self.model_name = model_name
+        self.device = "cpu"
+        self.workers = workers or max(1, cpu_count // 4)
+        self.threads_per_worker = threads_per_worker or max(1, cpu_count // self.workers)
+        # O modelo é carregado nos processos: o tempo de carga entra em inference
+        self.metrics: PipelineMetrics = None
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_process_worker,
+            initargs=(model_name, model_loader, self.threads_per_worker)
+        )
+
+    def transcribe(self, audio: list, batch_size: int = None, **kwargs) -> list:
+        """
+        Transcreve as entradas em paralelo, uma por processo.
+
+        Returns:
+            Lista de TranscriptionResult na mesma ordem das entradas
+        """
+        with measure(self.metrics, "inference"):
+            futures = [self._executor.submit(_transcribe_in_process, item, kwargs) for item in audio]
+            return [future.result() for future in futures]
+
+    def stop(self):
+        """Encerra os processos do pool."""
+        self._executor.shutdown()
+
+
+class BatchScheduler:
+    """
+    Agrupa chunks em batches e os envia para um ASRWorker.
+
+    O batch inicial é a estimativa baseada na memória disponível agora. Se um
+    batch já deu OOM para o modelo/dispositivo e a duração de chunk, o batch
+    fica abaixo desse tamanho: o maior que funcionou antes dele ou, sem
+    histórico, a metade. Em caso de OOM o batch é reduzido pela metade e o
+    mesmo grupo é repetido.
+
+    Com um ASRProcessPool o batch é um chunk por processo: cada processo tem
+    o seu modelo, então a estimativa de memória por batch não se aplica.
+    """
+
+    def __init__(
+        self,
+        worker: ASRWorker,
+        chunk_duration: float = 360,
+        max_batch_size: int = None,
+        ram_budget_mb: float = None,
+        mb_per_audio_second: float = DEFAULT_MB_PER_AUDIO_SECOND,
+        cache_path: str = None,
+        use_cache: bool = None
+    ):
+        """
+        Args:
+            worker: Worker que executa a transcrição
+            chunk_duration: Duração de cada chunk em segundos
+            max_batch_size: Limite superior do batch (None = automático)
+            ram_budget_mb: Orçamento de RAM para batches em CPU
+            mb_per_audio_second: Memória estimada por segundo de áudio
+            cache_path: Arquivo JSON com os batches que funcionaram e os
+                que deram OOM (padrão: BATCH_SIZE_CACHE_PATH)
+            use_cache: Se False, não lê nem grava o cache de batch sizes
+                (padrão: só com o modelo carregado por load_nemo_model)
+        """
+        self.worker = worker
+        self.chunk_duration = chunk_duration
+        self.max_batch_size = max_batch_size
+        self.ram_budget_mb = ram_budget_mb
+        self.mb_per_audio_second = mb_per_audio_second
+        if use_cache is None:
+            # Um model_loader próprio (ex.: stub) não diz nada sobre a memória
+            # do modelo real, que tem o mesmo model_name na chave do cache
+            use_cache = getattr(worker, "model_loader", load_nemo_model) is load_nemo_model
+        if not use_cache:
+            self.cache_path = None
+        else:
+            # Lido na hora, não na definição da função (testes trocam o caminho)
+            self.cache_path = Path(cache_path or BATCH_SIZE_CACHE_PATH)
+        self.batch_size = None
+
+    @property
+    def cache_key(self) -> str:
+        # O batch que cabe na memória depende da duração dos chunks
+        return f"{self.worker.model_name}|{get_device_name(self.worker.device)}|{self.chunk_duration:g}s"
+
+    def _load_cache(self) -> dict:
+        if self.cache_path is None or not self.cache_path.exists():
+            return {}
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @property
+    def uses_process_pool(self) -> bool:
+        return isinstance(self.worker, ASRProcessPool)
+
+    def _save_cache(self, cache: dict):
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f, indent=2)
+        os.replace(tmp_path, self.cache_path)
+
+    def _remember_batch_size(self, batch_size: int):
+        # O batch do pool é o número de processos, não um limite de memória
+        if self.cache_path is None or self.uses_process_pool:
+            return
+        cache = self._load_cache()
+        if cache.get(self.cache_key, 0) >= batch_size:
+            return
+        cache[self.cache_key] = batch_size
+        self._save_cache(cache)
+
+    def _remember_oom(self, batch_size: int):
+        # Os OOMs ficam à parte: só eles limitam o batch das próximas execuções
+        if self.cache_path is None or self.uses_process_pool:
+            return
+        cache = self._load_cache()
+        failures = cache.setdefault("oom", {})
+        if failures.get(self.cache_key, batch_size + 1) <= batch_size:
+            return
+        failures[self.cache_key] = batch_size
+        self._save_cache(cache)
+
+    def estimate_batch_size(self) -> int:
+        """Estima o batch a partir da memória disponível no dispositivo."""
+        available = get_available_memory_mb(self.worker.device, self.ram_budget_mb)
+        per_chunk = max(self.chunk_duration * self.mb_per_audio_second, 1.0)
+        return max(1, min(int(available * MEMORY_SAFETY_FACTOR / per_chunk), MAX_AUTO_BATCH_SIZE))
+
+    def initial_batch_size(self) -> int:
+        """Batch inicial: estimativa de memória atual, abaixo dos OOMs registrados."""
+        if self.uses_process_pool:
+            return max(1, self.max_batch_size or self.worker.workers)
+
+        batch_size = self.estimate_batch_size()
+        cache = self._load_cache()
+        failed = cache.get("oom", {}).get(self.cache_key)
+        if failed:
+            worked = cache.get(self.cache_key, 0)
+            batch_size = min(batch_size, worked if 0 < worked < failed else failed // 2)
+        if self.max_batch_size:
+            batch_size = min(batch_size, self.max_batch_size)
+        return max(1, batch_size)
+
+    def transcribe(self, audio: list, on_batch: Callable = None, **kwargs) -> list:
+        """
+        Transcreve todas as entradas em batches, preservando a ordem.
+
+        Args:
+            audio: Lista de entradas (caminhos dos chunks)
+            on_batch: Callback opcional (início, fim, total) após cada batch
+            **kwargs: Argumentos extras repassados para model.transcribe
+
+        Returns:
+            Lista de hipóteses na mesma ordem das entradas
+        """
+        if self.batch_size is None:
+            self.batch_size = self.initial_batch_size()
+
+        outputs = []
+        total = len(audio)
+        start = 0
+        while start < total:
+            batch = audio[start:start + self.batch_size]
+            try:
+                outputs.extend(self.worker.transcribe(batch, batch_size=len(batch), **kwargs))
+            except BaseException as e:
+                if not is_oom_error(e) or self.batch_size == 1:
+                    raise
+                self._remember_oom(len(batch))
+                self.batch_size = max(1, self.batch_size // 2)
+                print(f"Sem memória, reduzindo batch para {self.batch_size} e tentando de novo...")
+                continue
+
+            # Só um batch escolhido pelo scheduler diz algo sobre a memória: um
+            # batch cortado pelo max_batch_size ou o último, parcial, não
+            chosen = not self.max_batch_size or self.batch_size < self.max_batch_size
+            if chosen and len(batch) == self.batch_size:
+                self._remember_batch_size(len(batch))
+            start += len(batch)
+            if on_batch is not None:
+                on_batch(start - len(batch), start, total)
+
+        return outputs
+
+
+@atexit.register
+def shutdown_asr_workers():
+    """Encerra todos os workers compartilhados."""
+    with _workers_lock:
+        workers = list(_workers.values())
+        _workers.clear()
+    for worker in workers:
+        worker.stop()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Detecção de silêncio por energia para escolher pontos de corte entre chunks.
+
+Tudo é vetorizado com NumPy sobre frames de 20 ms: o custo é uma passada
+linear sobre a janela de busca de cada chunk, desprezível perto da inferência.
+"""
+
+import numpy as np
+
+FRAME_SECONDS = 0.02
+# Janela da média móvel de energia: procura regiões de silêncio, não frames isolados
+SMOOTH_SECONDS = 0.3
+
+
+def frame_energy(samples: np.ndarray, frame_size: int) -> np.ndarray:
+    """
+    Energia média (potência) de cada frame completo do sinal.
+
+    Args:
+        samples: Amostras mono float32
+        frame_size: Amostras por frame
+
+    Returns:
+        Array com a energia de cada frame
+    """
+    num_frames = len(samples) // frame_size
+    if num_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = samples[:num_frames * frame_size].reshape(num_frames, frame_size)
+    return np.einsum("ij,ij->i", frames, frames) / frame_size
+
+
+def find_silence_cut(samples: np.ndarray, sample_rate: int = 16000) -> int:
+    """
+    Encontra o ponto mais silencioso de um trecho de áudio.
+
+    A energia por frame é suavizada com uma média móvel e o corte é feito no
+    centro do frame de menor energia suavizada. Em caso de empate vence o
+    frame mais tardio, deixando o chunk o mais próximo possível do limite.
+
+    Args:
+        samples: Trecho onde procurar o corte (mono float32)
+        sample_rate: Taxa de amostragem
+
+    Returns:
+        Índice da amostra de corte dentro do trecho
+    """
+    frame_size = max(1, int(FRAME_SECONDS * sample_rate))
+    energy = frame_energy(samples, frame_size)
+    if len(energy) == 0:
+        return len(samples)
+
+    window = max(1, min(int(SMOOTH_SECONDS / FRAME_SECONDS), len(energy)))
+    smoothed = np.convolve(energy, np.ones(window, dtype=energy.dtype) / window, mode="same")
+    quietest = len(smoothed) - 1 - int(np.argmin(smoothed[::-1]))
+    return quietest * frame_size + frame_size // 2
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Pipeline em lote: download e transcrição de vários vídeos.
+
+Cada entrada (URL, arquivo local ou vídeo draft/ready do videos_status.json
+ou do banco do video_status_store) passa por dois estágios ligados por uma
+fila limitada:
+
+    download (pool de threads) → ASR
+
+O estágio de download roda em paralelo e o estágio de ASR usa um único worker
+de modelo compartilhado. O ASR decodifica o vídeo baixado direto para PCM, sem
+extrair um MP3 intermediário. Assim, o tempo total para um lote tende ao do
+estágio mais lento, não à soma de todos.
+
+Com --audio-only só o melhor stream de áudio é baixado. Com --stream as URLs
+não são gravadas em disco: a saída do yt-dlp vai direto para o ffmpeg do ASR.
+
+Uso: python batch_pipeline.py <entrada> [<entrada> ...] [opções]
+"""
+
+import json
+import queue
+import sys
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Callable
+
+from asr_worker import DEFAULT_MODEL, get_asr_worker
+from download_video import DownloadManager, fetch_video, get_video_title, open_download_stream
+from transcribe_chunks import transcribe_audio_chunked
+from video_status_store import VideoStatusStore
+
+STATUS_FILE = Path(__file__).parent / "videos_status.json"
+# Status do videos_status.json cujos vídeos entram no lote com --status
+PENDING_STATUSES = ("draft", "ready")
+
+# Sentinela de fim de fila
+_DONE = object()
+
+
+class PipelineItem:
+    """Uma entrada do lote e o que cada estágio produziu para ela."""
+
+    def __init__(self, source: str, video_id: str = None):
+        self.source = source
+        self.video_id = video_id
+        self.media_path = None
+        self.transcript_path = None
+        self.error = None
+
+    def to_dict(self) -> dict:
+        return {
+            "source": self.source,
+            "video_id": self.video_id,
+            "media_path": self.media_path,
+            "transcript_path": self.transcript_path,
+            "error": self.error,
+        }
+
+
+def is_url(source: str) -> bool:
+    return source.startswith(("http://", "https://"))
+
+
+def load_pending_videos(status_file: str = STATUS_FILE, store: VideoStatusStore = None) -> list[PipelineItem]:
+    """Vídeos draft/ready sem transcrição do videos_status.json (ou do store, se dado)."""
+    if store is not None:
+        return [
+            PipelineItem(str(store.db_path.parent / video["file_path"]), video_id=video["id"])
+            for video in store.next_missing_transcription(None, PENDING_STATUSES)
+        ]
+
+    status_path = Path(status_file)
+    with open(status_path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    return [
+        PipelineItem(str(status_path.parent / video["file_path"]), video_id=video["id"])
+        for video in data["videos"]
+        if video["status"] in PENDING_STATUSES and not video.get("has_transcription")
+    ]
+
+
+def mark_transcribed(video_id: str, status_file: str = STATUS_FILE):
+    """Marca has_transcription no videos_status.json."""
+    with open(status_file, encoding="utf-8") as f:
+        data = json.load(f)
+
+    for video in data["videos"]:
+        if video["id"] == video_id:
+            video["has_transcription"] = True
+    data["last_updated"] = date.today().isoformat()
+
+    with open(status_file, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def _run_stage(name: str, func: Callable, inbox: queue.Queue, outbox: queue.Queue, num_threads: int) -> threading.Thread:
+    """
+    Executa func(item) em num_threads threads, lendo de inbox e escrevendo em outbox.
+
+    Itens com erro de um estágio anterior passam direto. Quando todas as
+    threads terminam, _DONE é colocado em outbox.
+    """
+    def loop():
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                # Devolver a sentinela para as outras threads do estágio
+                inbox.put(_DONE)
+                return
+            if item.error is None:
+                try:
+                    func(item)
+                except Exception as e:
+                    item.error = f"{name}: {e}"
+                    print(f"[{name}] Erro em {item.source}: {e}")
+            outbox.put(item)
+
+    threads = [threading.Thread(target=loop, name=f"{name}-{i}", daemon=True) for i in range(num_threads)]
+    for thread in threads:
+        thread.start()
+
+    def close():
+        for thread in threads:
+            thread.join()
+        outbox.put(_DONE)
+
+    closer = threading.Thread(target=close, name=f"{name}-close", daemon=True)
+    closer.start()
+    return closer
+
+
+def run_batch_pipeline(
+    items: list[PipelineItem],
+    output_dir: str = "downloads",
+    download_workers: int = 2,
+    queue_size: int = 4,
+    audio_only: bool = False,
+    stream: bool = False,
+    model_name: str = DEFAULT_MODEL,
+    model_loader: Callable = None,
+    status_file: str = STATUS_FILE,
+    status_store: VideoStatusStore = None,
+    **transcribe_kwargs
+) -> list[dict]:
+    """
+    Processa o lote em estágios concorrentes.
+
+    Args:
+        items: Entradas do lote
+        output_dir: Diretório para os vídeos baixados (e as transcrições no modo stream)
+        download_workers: Threads do estágio de download
+        queue_size: Capacidade da fila entre os estágios
+        audio_only: Baixar só o melhor stream de áudio das URLs
+        stream: Transcrever as URLs direto da saída do yt-dlp, sem gravar a
+            mídia em disco (o download acontece no estágio de ASR)
+        model_name: Modelo de transcrição
+        model_loader: Função (model_name, device) -> modelo (ex.: stub em testes)
+        status_file: videos_status.json a atualizar (None = não atualizar)
+        status_store: Banco de status a atualizar no lugar do status_file
+        **transcribe_kwargs: Argumentos extras para transcribe_audio_chunked
+
+    Returns:
+        Lista com o resultado de cada entrada, na ordem de conclusão
+    """
+    worker = get_asr_worker(model_name, model_loader=model_loader)
+    manager = DownloadManager(max_concurrent=download_workers)
+    status_lock = threading.Lock()
+    output_format = transcribe_kwargs.get("output_format", "txt")
+
+    def download(item):
+        if not is_url(item.source):
+            if not Path(item.source).exists():
+                raise FileNotFoundError(f"Arquivo não encontrado: {item.source}")
+            item.media_path = item.source
+        elif stream:
+            # Só o nome da saída; a mídia é lida em stream pelo ASR
+            title = get_video_title(item.source)
+            if title is None:
+                raise RuntimeError("não foi possível obter o título")
+            Path(output_dir).mkdir(parents=True, exist_ok=True)
+            item.transcript_path = str(Path(output_dir) / f"{title}.{output_format}")
+            return
+        else:
+            print(f"[download] {item.source}")
+            item.media_path = fetch_video(item.source, output_dir, audio_only=audio_only, manager=manager)
+            if item.media_path is None:
+                raise RuntimeError("download falhou")
+        item.transcript_path = str(Path(item.media_path).with_suffix(f".{output_format}"))
+
+    def transcribe_stream(item):
+        process = open_download_stream(item.source, audio_only=True)
+        try:
+            transcribe_audio_chunked(
+                "-",
+                output_file=item.transcript_path,
+                worker=worker,
+                input_stream=process.stdout,
+                **transcribe_kwargs
+            )
+        except BaseException:
+            process.kill()
+            raise
+        finally:
+            process.stdout.close()
+            stderr = process.stderr.read().decode(errors="replace").strip()
+            process.stderr.close()
+            # Também após kill(), para não deixar o processo zumbi
+            returncode = process.wait()
+        if returncode != 0:
+            raise RuntimeError(f"yt-dlp falhou: {stderr}")
+
+    def transcribe(item):
+        if item.media_path is None:
+            print(f"[asr] {item.source} (stream)")
+            transcribe_stream(item)
+        else:
+            print(f"[asr] {item.media_path}")
+            transcribe_audio_chunked(
+                item.media_path,
+                output_file=item.transcript_path,
+                worker=worker,
+                **transcribe_kwargs
+            )
+        if item.video_id and status_store is not None:
+            # Atualização transacional de um único vídeo, sem reescrever o arquivo
+            status_store.update(item.video_id, has_transcription=True)
+        elif item.video_id and status_file:
+            with status_lock:
+                mark_transcribed(item.video_id, status_file)
+
+    inbox = queue.Queue(maxsize=queue_size)
+    downloaded = queue.Queue(maxsize=queue_size)
+    finished = queue.Queue()
+
+    _run_stage("download", download, inbox, downloaded, download_workers)
+    # Um único consumidor de ASR: o modelo é compartilhado
+    _run_stage("asr", transcribe, downloaded, finished, 1)
+
+    def feed():
+        for item in items:
+            inbox.put(item)
+        inbox.put(_DONE)
+
+    threading.Thread(target=feed, name="feed", daemon=True).start()
+
+    results = []
+    while True:
+        item = finished.get()
+        if item is _DONE:
+            break
+        results.append(item.to_dict())
+        status = "ERRO" if item.error else "OK"
+        print(f"[{status}] {item.source} ({len(results)}/{len(items)})")
+    return results
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Uso: python batch_pipeline.py <entrada> [<entrada> ...] [opções]")
+        print()
+        print("Entradas: URLs do YouTube ou arquivos locais (mp4, mkv, webm, m4a, mp3, ...)")
+        print()
+        print("Opções:")
+        print("  -s, --status              Incluir vídeos draft/ready sem transcrição do videos_status.json")
+        print("  -o, --output <diretório>  Diretório para os downloads (padrão: downloads)")
+        print("  -d, --downloads <n>       Downloads simultâneos (padrão: 2)")
+        print("  -a, --audio-only          Baixar só o áudio das URLs (sem vídeo e sem mux)")
+        print("  --stream                  Transcrever as URLs em stream, sem gravar a mídia em disco")
+        print("  --db <arquivo>            Ler e atualizar o status no banco SQLite (video_status_store)")
+        print("  -m, --model <nome>        Modelo (padrão: nvidia/parakeet-tdt-0.6b-v3)")
+        print("  -f, --format <formato>    Saída: txt, srt, vtt ou json (padrão: txt)")
+        print()
+        print("Exemplo:")
+        print("  python batch_pipeline.py --status")
+        print("  python batch_pipeline.py https://youtu.be/VIDEO_ID clip.mp4")
+        sys.exit(1)
+
+    sources = []
+    use_status = False
+    db_path = None
+    output_dir = "downloads"
+    download_workers = 2
+    audio_only = False
+    stream = False
+    model_name = DEFAULT_MODEL
+    output_format = "txt"
+
+    # Parse argumentos
+    args = sys.argv[1:]
+    i = 0
+    while i < len(args):
+        if args[i] in ("-s", "--status"):
+            use_status = True
+            i += 1
+        elif args[i] in ("-o", "--output"):
+            output_dir = args[i + 1]
+            i += 2
+        elif args[i] in ("-d", "--downloads"):
+            download_workers = int(args[i + 1])
+            i += 2
+        elif args[i] in ("-a", "--audio-only"):
+            audio_only = True
+            i += 1
+        elif args[i] == "--stream":
+            stream = True
+            i += 1
+        elif args[i] == "--db":
+            db_path = args[i + 1]
+            i += 2
+        elif args[i] in ("-m", "--model"):
+            model_name = args[i + 1]
+            i += 2
+        elif args[i] in ("-f", "--format"):
+            output_format = args[i + 1]
+            i += 2
+        else:
+            sources.append(args[i])
+            i += 1
+
+    status_store = VideoStatusStore(db_path) if db_path else None
+    items = [PipelineItem(source) for source in sources]
+    if use_status:
+        items += load_pending_videos(store=status_store)
+
+    if not items:
+        print("Nenhuma entrada para processar.")
+        sys.exit(0)
+
+    print(f"Processando {len(items)} entradas...")
+    results = run_batch_pipeline(
+        items,
+        output_dir=output_dir,
+        download_workers=download_workers,
+        audio_only=audio_only,
+        stream=stream,
+        model_name=model_name,
+        status_store=status_store,
+        output_format=output_format
+    )
+
+    errors = [result for result in results if result["error"]]
+    print(f"\n=== Concluído: {len(results) - len(errors)} OK, {len(errors)} com erro ===")
+    for result in errors:
+        print(f"  {result['source']}: {result['error']}")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+"""
+Benchmarks do pipeline de transcrição.
+
+Uso: python bench.py <benchmark> [opções]
+
+Benchmarks:
+    segmentation   Compara a divisão em chunks antiga (um ffmpeg por chunk)
+                   com a decodificação única em streaming (iter_audio_chunks)
+    scaling        Mede o real-time factor da transcrição em CPU com
+                   ASRProcessPool para diferentes números de processos
+    pipeline       Executa transcribe_audio_chunked instrumentado (stub e/ou
+                   modelo real em CPU) e compara com um baseline salvo
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+
+from asr_worker import DEFAULT_MODEL, ASRProcessPool, ASRWorker, TranscriptionResult
+from pipeline_metrics import PipelineMetrics
+from transcribe_chunks import (
+    SAMPLE_RATE, get_audio_duration, iter_audio_chunks, iter_pcm_chunks, transcribe_audio_chunked
+)
+
+DEFAULT_BASELINE_PATH = Path(__file__).parent / "bench_baseline.json"
+# Aumento relativo tolerado antes de acusar regressão
+DEFAULT_TOLERANCE = 0.2
+# Diferenças absolutas menores que isto são ruído (segundos / MB)
+MIN_SECONDS_DELTA = 0.1
+MIN_MB_DELTA = 16.0
+PIPELINE_MODES = ("files", "in_memory", "vad")
+
+
+class StubASRModel:
+    """
+    Modelo falso que consome CPU proporcional à duração do áudio.
+
+    Faz FFTs sobre o sinal para simular o custo da inferência sem baixar o
+    modelo real.
+    """
+
+    def transcribe(self, audio: list, **kwargs) -> list:
+        outputs = []
+        for samples in audio:
+            if isinstance(samples, (str, Path)):
+                # Chunk WAV PCM 16 bits: pular o cabeçalho e converter para float
+                samples = np.fromfile(samples, dtype=np.int16, offset=44) / 32768.0
+            samples = np.asarray(samples, dtype=np.float32)
+            frames = samples[:len(samples) // 512 * 512].reshape(-1, 512)
+            for _ in range(20):
+                np.abs(np.fft.rfft(frames, axis=1))
+            outputs.append(TranscriptionResult(f"{len(samples) / SAMPLE_RATE:.1f}s de áudio"))
+        return outputs
+
+
+def load_stub_model(model_name: str, device: str) -> StubASRModel:
+    """model_loader do StubASRModel (nível de módulo para funcionar em subprocessos)."""
+    return StubASRModel()
+
+
+def generate_synthetic_audio(output_path: str, duration: float) -> str:
+    """
+    Gera um MP3 sintético (tom de 440 Hz, estéreo 44.1kHz) com a duração dada.
+
+    Args:
+        output_path: Caminho do MP3 a gerar
+        duration: Duração em segundos
+
+    Returns:
+        Caminho do arquivo gerado
+    """
+    cmd = [
+        "ffmpeg",
+        "-v", "error",
+        "-f", "lavfi",
+        "-i", f"sine=frequency=440:sample_rate=44100:duration={duration}",
+        "-ac", "2",
+        "-b:a", "128k",
+        "-y",
+        str(output_path)
+    ]
+    subprocess.run(cmd, check=True, capture_output=True, text=True)
+    return str(output_path)
+
+
+def legacy_split_audio_into_chunks(
+    audio_path: str,
+    chunk_duration: int,
+    output_dir: str
+) -> list[str]:
+    """Implementação original: um ffmpeg por chunk com -ss depois de -i."""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    total_duration = get_audio_duration(audio_path)
+    num_chunks = int(total_duration // chunk_duration) + (1 if total_duration % chunk_duration > 0 else 0)
+
+    chunk_paths = []
+    for i in range(num_chunks):
+        chunk_path = output_dir / f"chunk_{i:04d}.wav"
+        cmd = [
+            "ffmpeg",
+            "-i", str(audio_path),
+            "-ss", str(i * chunk_duration),
+            "-t", str(chunk_duration),
+            "-ar", "16000",
+            "-ac", "1",
+            "-y",
+            str(chunk_path)
+        ]
+        subprocess.run(cmd, check=True, capture_output=True, text=True)
+        chunk_paths.append(str(chunk_path))
+
+    return chunk_paths
+
+
+def bench_segmentation(hours: float = 3.0, chunk_duration: int = 360) -> dict:
+    """
+    Mede o tempo de divisão em chunks das duas implementações.
+
+    Args:
+        hours: Duração do áudio sintético em horas
+        chunk_duration: Duração de cada chunk em segundos
+
+    Returns:
+        Dicionário com os tempos (s) e o speedup
+    """
+    work_dir = Path(tempfile.mkdtemp(prefix="bench_segmentation_"))
+
+    try:
+        print(f"Gerando áudio sintético de {hours:.1f}h...")
+        audio_path = generate_synthetic_audio(work_dir / "synthetic.mp3", hours * 3600)
+
+        print("Executando divisão antiga (um ffmpeg por chunk)...")
+        start = time.perf_counter()
+        legacy_chunks = legacy_split_audio_into_chunks(audio_path, chunk_duration, work_dir / "legacy")
+        legacy_time = time.perf_counter() - start
+
+        print("Executando divisão em streaming (decodificação única)...")
+        start = time.perf_counter()
+        streaming_chunks = list(iter_audio_chunks(audio_path, chunk_duration, work_dir / "streaming"))
+        streaming_time = time.perf_counter() - start
+
+        if len(legacy_chunks) != len(streaming_chunks):
+            print(f"AVISO: número de chunks difere ({len(legacy_chunks)} vs {len(streaming_chunks)})")
+
+        return {
+            "hours": hours,
+            "chunks": len(streaming_chunks),
+            "legacy_s": legacy_time,
+            "streaming_s": streaming_time,
+            "speedup": legacy_time / streaming_time if streaming_time > 0 else float("inf"),
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def bench_scaling(
+    minutes: float = 30.0,
+    chunk_duration: int = 60,
+    worker_counts: list[int] = None,
+    stub: bool = False,
+    model_name: str = DEFAULT_MODEL
+) -> list[dict]:
+    """
+    Mede o real-time factor (tempo de transcrição / duração do áudio) da
+    transcrição em CPU para cada número de processos.
+
+    Args:
+        minutes: Duração do áudio sintético em minutos
+        chunk_duration: Duração de cada chunk em segundos
+        worker_counts: Números de processos a testar (padrão: 1, 2, 4, ... até os núcleos)
+        stub: Se True, usa StubASRModel no lugar do modelo real
+        model_name: Modelo real a usar quando stub=False
+
+    Returns:
+        Lista com workers, threads, tempo (s) e RTF de cada configuração
+    """
+    cpu_count = os.cpu_count() or 1
+    if worker_counts is None:
+        worker_counts = []
+        n = 1
+        while n <= cpu_count:
+            worker_counts.append(n)
+            n *= 2
+
+    work_dir = Path(tempfile.mkdtemp(prefix="bench_scaling_"))
+
+    try:
+        print(f"Gerando áudio sintético de {minutes:.0f} min...")
+        audio_path = generate_synthetic_audio(work_dir / "synthetic.mp3", minutes * 60)
+        chunks = [chunk.copy() for chunk in iter_pcm_chunks(audio_path, chunk_duration)]
+        audio_seconds = sum(len(chunk) for chunk in chunks) / SAMPLE_RATE
+
+        results = []
+        for workers in worker_counts:
+            pool = ASRProcessPool(
+                model_name,
+                workers=workers,
+                threads_per_worker=max(1, cpu_count // workers),
+                model_loader=load_stub_model if stub else None
+            )
+            try:
+                # Aquecimento: carrega o modelo em todos os processos
+                pool.transcribe(chunks[:workers])
+
+                start = time.perf_counter()
+                pool.transcribe(chunks)
+                elapsed = time.perf_counter() - start
+            finally:
+                pool.stop()
+
+            result = {
+                "workers": workers,
+                "threads": pool.threads_per_worker,
+                "seconds": elapsed,
+                "rtf": elapsed / audio_seconds,
+            }
+            results.append(result)
+            print(f"  {workers:>3} processos x {result['threads']:>3} threads: "
+                  f"{elapsed:.1f}s, RTF {result['rtf']:.3f}")
+
+        return results
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def summarize_metrics(data: dict) -> dict:
+    """Métricas de uma execução comparáveis com o baseline."""
+    return {
+        "rtf": data["rtf"],
+        "wall_seconds": data["wall_seconds"],
+        "peak_rss_mb": data["peak_rss_mb"],
+        "temp_bytes_written": data["counters"].get("temp_bytes_written", 0),
+        "stages": {name: entry["seconds"] for name, entry in data["stages"].items()},
+    }
+
+
+def bench_pipeline(
+    minutes: float = 15.0,
+    chunk_duration: int = 60,
+    model_kinds: list[str] = None,
+    mode: str = "files",
+    model_name: str = DEFAULT_MODEL,
+    metrics_file: str = None
+) -> dict:
+    """
+    Transcreve um áudio sintético com métricas por estágio.
+
+    Cada execução usa um ASRWorker novo, então o tempo de carregamento do
+    modelo entra nas métricas. O cache de transcrições fica desligado.
+
+    Args:
+        minutes: Duração do áudio sintético em minutos
+        chunk_duration: Duração de cada chunk em segundos
+        model_kinds: "stub" e/ou "cpu" (modelo real em CPU); padrão: ["stub"]
+        mode: Modo de divisão: files, in_memory ou vad
+        model_name: Modelo real a usar em "cpu"
+        metrics_file: JSON lines onde acrescentar as métricas completas
+
+    Returns:
+        Dicionário {nome da configuração: resumo das métricas}
+    """
+    if mode not in PIPELINE_MODES:
+        raise ValueError(f"Modo inválido: {mode} (use {', '.join(PIPELINE_MODES)})")
+
+    work_dir = Path(tempfile.mkdtemp(prefix="bench_pipeline_"))
+
+    try:
+        print(f"Gerando áudio sintético de {minutes:g} min...")
+        audio_path = generate_synthetic_audio(work_dir / "synthetic.mp3", minutes * 60)
+
+        results = {}
+        for kind in model_kinds or ["stub"]:
+            name = f"{kind}/{mode}/{minutes:g}min/{chunk_duration}s"
+            print(f"\n--- {name} ---")
+            if kind == "stub":
+                worker = ASRWorker("stub", device="cpu", model_loader=load_stub_model)
+            else:
+                worker = ASRWorker(model_name, device="cpu")
+
+            metrics = PipelineMetrics(labels={"config": name})
+            try:
+                transcribe_audio_chunked(
+                    audio_path,
+                    output_file=work_dir / f"{kind}.txt",
+                    chunk_duration=chunk_duration,
+                    worker=worker,
+                    in_memory=mode == "in_memory",
+                    vad=mode == "vad",
+                    metrics=metrics
+                )
+            finally:
+                worker.stop()
+
+            if metrics_file:
+                metrics.write_jsonl(metrics_file)
+            results[name] = summarize_metrics(metrics.to_dict())
+
+        return results
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def compare_with_baseline(results: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> list[str]:
+    """
+    Compara resultados com o baseline.
+
+    Uma métrica regrediu se passou do valor do baseline em mais de
+    tolerance (relativo) e em mais que o ruído mínimo (absoluto).
+
+    Returns:
+        Descrição de cada regressão encontrada
+    """
+    def check(name: str, metric: str, current, reference, min_delta: float):
+        if current is None or reference is None:
+            return
+        if current > reference * (1 + tolerance) and current - reference > min_delta:
+            regressions.append(
+                f"{name}: {metric} {current:.3f} > baseline {reference:.3f} (+{(current / reference - 1) * 100:.0f}%)"
+                if reference else f"{name}: {metric} {current:.3f} > baseline 0"
+            )
+
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            print(f"Sem baseline para {name}")
+            continue
+        check(name, "rtf", result["rtf"], reference["rtf"], 0)
+        check(name, "peak_rss_mb", result["peak_rss_mb"], reference["peak_rss_mb"], MIN_MB_DELTA)
+        check(name, "temp_bytes_written", result["temp_bytes_written"], reference["temp_bytes_written"], 0)
+        for stage, seconds in result["stages"].items():
+            check(name, f"{stage}_seconds", seconds, reference["stages"].get(stage), MIN_SECONDS_DELTA)
+    return regressions
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Uso: python bench.py <benchmark> [opções]")
+        print()
+        print("Benchmarks:")
+        print("  segmentation              Divisão antiga vs. streaming")
+        print("  scaling                   RTF da transcrição em CPU vs. número de processos")
+        print("  pipeline                  Pipeline instrumentado, comparado com um baseline")
+        print()
+        print("Opções:")
+        print("  -H, --hours <horas>       Duração do áudio sintético (padrão: 3 / scaling: 0.5)")
+        print("  -c, --chunk <segundos>    Duração do chunk (padrão: 360 = 6 min / scaling: 60)")
+        print("  -w, --workers <n,n,...>   Números de processos do scaling (padrão: 1, 2, 4, ...)")
+        print("  --stub                    Usar modelo stub (sem baixar o modelo); no pipeline é o padrão")
+        print("  --cpu                     Pipeline com o modelo real em CPU (com --stub, executa os dois)")
+        print("  --mode <modo>             Divisão no pipeline: files, in_memory ou vad (padrão: files)")
+        print("  --baseline <arquivo>      Baseline do pipeline (padrão: bench_baseline.json)")
+        print("  --save-baseline           Gravar os resultados do pipeline como baseline")
+        print("  --tolerance <fração>      Piora tolerada antes de acusar regressão (padrão: 0.2)")
+        print("  --metrics <arquivo>       Acrescentar as métricas completas em JSON lines")
+        print()
+        print("Exemplo:")
+        print("  python bench.py segmentation -H 2")
+        print("  python bench.py scaling --stub -w 1,2,4,8")
+        print("  python bench.py pipeline -H 0.25 --save-baseline")
+        print("  python bench.py pipeline -H 0.25 --stub --cpu --mode in_memory")
+        sys.exit(1)
+
+    benchmark = sys.argv[1]
+    hours = None
+    chunk_duration = None
+    worker_counts = None
+    stub = False
+    cpu = False
+    mode = "files"
+    baseline_path = DEFAULT_BASELINE_PATH
+    save_baseline = False
+    tolerance = DEFAULT_TOLERANCE
+    metrics_file = None
+
+    # Parse argumentos
+    args = sys.argv[2:]
+    i = 0
+    while i < len(args):
+        if args[i] in ("-H", "--hours"):
+            hours = float(args[i + 1])
+            i += 2
+        elif args[i] in ("-c", "--chunk"):
+            chunk_duration = int(args[i + 1])
+            i += 2
+        elif args[i] in ("-w", "--workers"):
+            worker_counts = [int(n) for n in args[i + 1].split(",")]
+            i += 2
+        elif args[i] == "--stub":
+            stub = True
+            i += 1
+        elif args[i] == "--cpu":
+            cpu = True
+            i += 1
+        elif args[i] == "--mode":
+            mode = args[i + 1]
+            i += 2
+        elif args[i] == "--baseline":
+            baseline_path = Path(args[i + 1])
+            i += 2
+        elif args[i] == "--save-baseline":
+            save_baseline = True
+            i += 1
+        elif args[i] == "--tolerance":
+            tolerance = float(args[i + 1])
+            i += 2
+        elif args[i] == "--metrics":
+            metrics_file = args[i + 1]
+            i += 2
+        else:
+            i += 1
+
+    if benchmark == "segmentation":
+        result = bench_segmentation(hours or 3.0, chunk_duration or 360)
+        print("\n=== Resultado ===")
+        print(f"Áudio: {result['hours']:.1f}h, {result['chunks']} chunks")
+        print(f"Divisão antiga:    {result['legacy_s']:.1f}s")
+        print(f"Divisão streaming: {result['streaming_s']:.1f}s")
+        print(f"Speedup: {result['speedup']:.1f}x")
+    elif benchmark == "scaling":
+        results = bench_scaling((hours or 0.5) * 60, chunk_duration or 60, worker_counts, stub)
+        baseline = results[0]["seconds"]
+        print("\n=== Resultado ===")
+        print("processos  threads  tempo (s)    RTF  speedup")
+        for result in results:
+            print(f"{result['workers']:>9}  {result['threads']:>7}  {result['seconds']:>9.1f}  "
+                  f"{result['rtf']:>5.3f}  {baseline / result['seconds']:>6.2f}x")
+    elif benchmark == "pipeline":
+        model_kinds = (["stub"] if stub or not cpu else []) + (["cpu"] if cpu else [])
+        results = bench_pipeline((hours or 0.25) * 60, chunk_duration or 60, model_kinds, mode,
+                                 metrics_file=metrics_file)
+
+        print("\n=== Resultado ===")
+        for name, result in results.items():
+            print(f"{name}: {result['wall_seconds']:.1f}s, RTF {result['rtf']:.4f}, "
+                  f"pico RSS {result['peak_rss_mb']:.0f} MB, "
+                  f"{result['temp_bytes_written'] / 1e6:.1f} MB temporários")
+            for stage, seconds in sorted(result["stages"].items(), key=lambda item: -item[1]):
+                print(f"  {stage:<14} {seconds:>8.3f}s")
+
+        baseline = {}
+        if baseline_path.exists():
+            with open(baseline_path, encoding="utf-8") as f:
+                baseline = json.load(f)
+
+        if save_baseline:
+            baseline.update(results)
+            with open(baseline_path, "w", encoding="utf-8") as f:
+                json.dump(baseline, f, ensure_ascii=False, indent=2)
+            print(f"\nBaseline salvo em {baseline_path}")
+        elif baseline:
+            regressions = compare_with_baseline(results, baseline, tolerance)
+            if regressions:
+                print(f"\n=== {len(regressions)} regressões (tolerância {tolerance:.0%}) ===")
+                for regression in regressions:
+                    print(f"  {regression}")
+                sys.exit(1)
+            print(f"\nSem regressões em relação a {baseline_path} (tolerância {tolerance:.0%})")
+        else:
+            print(f"\nNenhum baseline em {baseline_path} (use --save-baseline)")
+    else:
+        print(f"Benchmark desconhecido: {benchmark}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,44 @@
 #!/usr/bin/env python3
-"""Script para baixar vídeos do YouTube usando yt-dlp."""
+"""
+Script para baixar vídeos do YouTube usando yt-dlp.
 
+DownloadManager executa vários downloads ao mesmo tempo, com limite global de
+downloads simultâneos e de banda, retry com backoff por download e retomada
+de downloads parciais (--continue). O progresso do yt-dlp é lido como JSON
+(--progress-template) e entregue como eventos DownloadProgress. No modo
+somente áudio é baixado apenas o melhor stream de áudio, sem vídeo e sem mux.
+
+Qualquer URL suportada pelo yt-dlp funciona, inclusive links diretos para
+arquivos em um servidor HTTP local (ex.: python -m http.server).
+"""
+
+import json
+import queue
+import re
 import subprocess
 import sys
+import threading
+import time
 from pathlib import Path
+from typing import Callable, NamedTuple
+
+# Prefixos das linhas de progresso e do caminho final na saída do yt-dlp
+PROGRESS_PREFIX = "[progress]"
+FILEPATH_PREFIX = "[filepath]"
+
+VIDEO_FORMAT = "bestvideo+bestaudio/best"
+AUDIO_FORMAT = "bestaudio/best"
+
+_RATE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+# Falhas que valem nova tentativa: HTTP 5xx, 408 e 429, timeouts e erros de
+# rede. Demais erros (HTTP 4xx, URL não suportada, vídeo indisponível) são
+# permanentes.
+TRANSIENT_ERROR_PATTERN = re.compile(
+    r"HTTP Error (5\d\d|408|429)|timed? ?out|connection|network|temporar|"
+    r"reset by peer|incomplete ?read|name resolution|ssl",
+    re.IGNORECASE
+)
 
 
 def download_video(url: str, output_dir: str = ".") -> bool:
@@ -41,19 +76,442 @@ def download_video(url: str, output_dir: str = ".") -> bool:
         return False
 
 
+def fetch_video(url: str, output_dir: str = ".", audio_only: bool = False, manager: "DownloadManager" = None) -> str | None:
+    """
+    Baixa um vídeo do YouTube e retorna o caminho do arquivo final.
+
+    Args:
+        url: URL do vídeo do YouTube
+        output_dir: Diretório de saída (padrão: diretório atual)
+        audio_only: Baixar só o melhor stream de áudio
+        manager: DownloadManager a usar (padrão: um novo, com retry)
+
+    Returns:
+        Caminho do arquivo baixado, ou None se o download falhou
+    """
+    job = (manager or DownloadManager()).download(DownloadJob(url, output_dir, audio_only))
+    if job.error is not None:
+        print(f"Erro ao baixar vídeo: {job.error}")
+        return None
+    return job.path
+
+
+def is_transient_error(message: str) -> bool:
+    """Indica se o erro do yt-dlp é passageiro e vale uma nova tentativa."""
+    return TRANSIENT_ERROR_PATTERN.search(message or "") is not None
+
+
+def parse_rate(rate: str) -> int:
+    """
+    Converte uma taxa no formato do yt-dlp (ex.: 500K, 4.2M) em bytes/s.
+
+    Args:
+        rate: Taxa com sufixo opcional K, M ou G
+
+    Returns:
+        Taxa em bytes por segundo
+    """
+    match = re.fullmatch(r"\s*([\d.]+)\s*([KMG]?)i?B?\s*", str(rate), re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Taxa inválida: {rate}")
+    return int(float(match.group(1)) * _RATE_UNITS[match.group(2).upper()])
+
+
+class DownloadProgress(NamedTuple):
+    """Evento de progresso de um download."""
+    url: str
+    status: str  # downloading, finished, error ou retrying
+    downloaded_bytes: int = 0
+    total_bytes: int = None
+    speed: float = None
+    eta: float = None
+    fragment_index: int = None
+    fragment_count: int = None
+    attempt: int = 1
+    message: str = None
+
+
+class DownloadJob:
+    """Um download e o seu resultado."""
+
+    def __init__(self, url: str, output_dir: str = ".", audio_only: bool = False):
+        self.url = url
+        self.output_dir = output_dir
+        self.audio_only = audio_only
+        self.path = None
+        self.error = None
+        self.attempts = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "url": self.url,
+            "audio_only": self.audio_only,
+            "path": self.path,
+            "error": self.error,
+            "attempts": self.attempts,
+        }
+
+
+def build_download_command(
+    url: str,
+    output_dir: str = ".",
+    audio_only: bool = False,
+    rate_limit: int = None,
+    concurrent_fragments: int = 4
+) -> list[str]:
+    """
+    Monta o comando do yt-dlp com saída de progresso estruturada.
+
+    Args:
+        url: URL a baixar
+        output_dir: Diretório de saída
+        audio_only: Baixar só o melhor stream de áudio (sem mux)
+        rate_limit: Limite de banda deste download em bytes/s (None = sem limite)
+        concurrent_fragments: Fragmentos DASH/HLS baixados em paralelo
+
+    Returns:
+        Lista de argumentos do comando
+    """
+    cmd = [
+        "yt-dlp",
+        "-f", AUDIO_FORMAT if audio_only else VIDEO_FORMAT,
+        "-o", str(Path(output_dir) / "%(title)s.%(ext)s"),
+        "--no-playlist",
+        # Retoma arquivos .part e fragmentos de tentativas anteriores
+        "--continue",
+        "--concurrent-fragments", str(concurrent_fragments),
+        "--newline",
+        "--progress",
+        "--progress-template", f"download:{PROGRESS_PREFIX}%(progress)j",
+        "--print", f"after_move:{FILEPATH_PREFIX}%(filepath)s",
+    ]
+    if not audio_only:
+        cmd += ["--merge-output-format", "mp4"]
+    if rate_limit:
+        cmd += ["--limit-rate", str(int(rate_limit))]
+    cmd.append(url)
+    return cmd
+
+
+def _parse_progress(url: str, line: str, attempt: int) -> DownloadProgress | None:
+    """Converte uma linha de progresso do yt-dlp em DownloadProgress."""
+    try:
+        progress = json.loads(line[len(PROGRESS_PREFIX):])
+    except ValueError:
+        return None
+    return DownloadProgress(
+        url=url,
+        status=progress.get("status", "downloading"),
+        downloaded_bytes=progress.get("downloaded_bytes") or 0,
+        total_bytes=progress.get("total_bytes") or progress.get("total_bytes_estimate"),
+        speed=progress.get("speed"),
+        eta=progress.get("eta"),
+        fragment_index=progress.get("fragment_index"),
+        fragment_count=progress.get("fragment_count"),
+        attempt=attempt,
+    )
+
+
+class DownloadManager:
+    """
+    Executa downloads do yt-dlp em paralelo com orçamento global.
+
+    No máximo max_concurrent downloads rodam ao mesmo tempo, mesmo com
+    download() chamado de várias threads. A banda total é dividida entre os
+    downloads pendentes (até max_concurrent): um download sozinho usa a banda
+    toda. O yt-dlp não muda o limite durante a execução, então a fatia é
+    calculada no início de cada tentativa. Downloads que falham são repetidos
+    com backoff exponencial; cada nova tentativa retoma os arquivos parciais
+    da anterior.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 3,
+        rate_limit: int = None,
+        retries: int = 3,
+        backoff: float = 2.0,
+        concurrent_fragments: int = 4,
+        on_progress: Callable[[DownloadProgress], None] = None
+    ):
+        """
+        Args:
+            max_concurrent: Máximo de downloads simultâneos
+            rate_limit: Banda total em bytes/s (None = sem limite)
+            retries: Tentativas extras por download após uma falha
+            backoff: Espera base (s) entre tentativas, dobrada a cada falha
+            concurrent_fragments: Fragmentos DASH/HLS baixados em paralelo por download
+            on_progress: Função chamada com cada DownloadProgress (de várias threads)
+        """
+        self.max_concurrent = max(1, max_concurrent)
+        self.rate_limit = rate_limit
+        self.retries = retries
+        self.backoff = backoff
+        self.concurrent_fragments = concurrent_fragments
+        self.on_progress = on_progress
+        self._slots = threading.BoundedSemaphore(self.max_concurrent)
+        self._lock = threading.Lock()
+        # Downloads pedidos e ainda não concluídos (rodando ou esperando slot)
+        self._pending = 0
+
+    def _add_pending(self, count: int):
+        with self._lock:
+            self._pending += count
+
+    @property
+    def rate_limit_per_job(self) -> int | None:
+        if not self.rate_limit:
+            return None
+        with self._lock:
+            sharing = min(self.max_concurrent, max(1, self._pending))
+        return max(1, self.rate_limit // sharing)
+
+    def _emit(self, event: DownloadProgress):
+        if self.on_progress is not None:
+            self.on_progress(event)
+
+    def _attempt(self, job: DownloadJob) -> str:
+        """Uma execução do yt-dlp. Retorna o caminho final ou levanta RuntimeError."""
+        cmd = build_download_command(
+            job.url,
+            job.output_dir,
+            audio_only=job.audio_only,
+            rate_limit=self.rate_limit_per_job,
+            concurrent_fragments=self.concurrent_fragments
+        )
+        process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1
+        )
+
+        path = None
+        last_lines = []
+        with process.stdout:
+            for line in process.stdout:
+                line = line.rstrip("\n")
+                if line.startswith(PROGRESS_PREFIX):
+                    event = _parse_progress(job.url, line, job.attempts)
+                    if event is not None:
+                        self._emit(event)
+                elif line.startswith(FILEPATH_PREFIX):
+                    path = line[len(FILEPATH_PREFIX):]
+                elif line.strip():
+                    last_lines = (last_lines + [line])[-5:]
+
+        if process.wait() != 0 or path is None:
+            message = last_lines[-1] if last_lines else f"yt-dlp saiu com código {process.returncode}"
+            raise RuntimeError(message)
+        return path
+
+    def download(self, job: DownloadJob) -> DownloadJob:
+        """
+        Executa um download com retry e backoff.
+
+        Só falhas passageiras (rede, timeout, HTTP 5xx/408/429) são repetidas;
+        erros permanentes como HTTP 404 ou URL não suportada falham na hora.
+
+        Args:
+            job: Download a executar (job.output_dir é criado se necessário)
+
+        Returns:
+            O próprio job, com path ou error preenchido
+        """
+        self._add_pending(1)
+        try:
+            return self._download(job)
+        finally:
+            self._add_pending(-1)
+
+    def _download(self, job: DownloadJob) -> DownloadJob:
+        """download() de um job já contado na divisão da banda."""
+        Path(job.output_dir).mkdir(parents=True, exist_ok=True)
+
+        with self._slots:
+            for attempt in range(1, self.retries + 2):
+                job.attempts = attempt
+                try:
+                    job.path = self._attempt(job)
+                    job.error = None
+                    return job
+                except FileNotFoundError:
+                    job.error = "yt-dlp não está instalado. Instale com: pip install yt-dlp"
+                    break
+                except RuntimeError as e:
+                    job.error = str(e)
+                    if not is_transient_error(job.error):
+                        break
+
+                if attempt <= self.retries:
+                    delay = self.backoff * 2 ** (attempt - 1)
+                    self._emit(DownloadProgress(job.url, "retrying", attempt=attempt, message=job.error))
+                    time.sleep(delay)
+
+        self._emit(DownloadProgress(job.url, "error", attempt=job.attempts, message=job.error))
+        return job
+
+    def download_all(self, jobs: list[DownloadJob]) -> list[DownloadJob]:
+        """
+        Executa os downloads com até max_concurrent ao mesmo tempo.
+
+        Returns:
+            Os jobs, na ordem recebida
+        """
+        pending = queue.Queue()
+        for job in jobs:
+            pending.put(job)
+        # Todos entram na divisão da banda antes da primeira tentativa começar
+        self._add_pending(len(jobs))
+
+        def loop():
+            while True:
+                try:
+                    job = pending.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    self._download(job)
+                finally:
+                    self._add_pending(-1)
+
+        threads = [
+            threading.Thread(target=loop, name=f"download-{i}", daemon=True)
+            for i in range(min(self.max_concurrent, len(jobs)))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # Jobs que sobraram na fila se uma thread morreu com exceção
+        self._add_pending(-pending.qsize())
+        return jobs
+
+
+def get_video_title(url: str) -> str | None:
+    """Título do vídeo (como no nome do arquivo baixado), sem baixar a mídia."""
+    cmd = ["yt-dlp", "--no-playlist", "--skip-download", "--print", "filename", "-o", "%(title)s", url]
+    try:
+        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+    lines = result.stdout.strip().splitlines()
+    return lines[-1] if lines else None
+
+
+def open_download_stream(url: str, audio_only: bool = True, rate_limit: int = None) -> subprocess.Popen:
+    """
+    Inicia o yt-dlp escrevendo a mídia em stdout, sem arquivo em disco.
+
+    O stdout do processo pode ser passado direto para o ffmpeg (ex.:
+    transcribe_audio_chunked("-", input_stream=process.stdout)). Só formatos
+    que não precisam de mux funcionam em stream, por isso o padrão é áudio.
+
+    Args:
+        url: URL a baixar
+        audio_only: Baixar só o melhor stream de áudio
+        rate_limit: Limite de banda em bytes/s (None = sem limite)
+
+    Returns:
+        Processo do yt-dlp (o chamador deve fechar stdout e chamar wait)
+    """
+    cmd = [
+        "yt-dlp",
+        "-f", AUDIO_FORMAT if audio_only else "best",
+        "-o", "-",
+        "--no-playlist",
+        "--quiet",
+        "--no-progress",
+    ]
+    if rate_limit:
+        cmd += ["--limit-rate", str(int(rate_limit))]
+    cmd.append(url)
+    return subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+
+def print_progress(event: DownloadProgress):
+    """on_progress para terminal: uma linha por evento."""
+    if event.status == "downloading":
+        percent = f"{100 * event.downloaded_bytes / event.total_bytes:5.1f}%" if event.total_bytes else "    ?"
+        speed = f"{event.speed / 1024 ** 2:.1f} MiB/s" if event.speed else "-"
+        print(f"[{percent}] {speed:>12}  {event.url}")
+    elif event.status == "finished":
+        print(f"[concluído] {event.url}")
+    elif event.status == "retrying":
+        print(f"[tentativa {event.attempt} falhou] {event.url}: {event.message}")
+    elif event.status == "error":
+        print(f"[erro] {event.url}: {event.message}")
+
+
 def main():
     if len(sys.argv) < 2:
-        print("Uso: python download_video.py <URL> [diretório_saída]")
+        print("Uso: python download_video.py <URL> [<URL> ...] [diretório_saída] [opções]")
+        print()
+        print("Opções:")
+        print("  -a, --audio-only           Baixar só o melhor áudio (para transcrição)")
+        print("  -j, --jobs <n>             Downloads simultâneos (padrão: 3)")
+        print("  -r, --limit-rate <taxa>    Banda total, ex.: 5M ou 500K (padrão: sem limite)")
+        print("  -N, --fragments <n>        Fragmentos paralelos por download (padrão: 4)")
+        print("  --retries <n>              Tentativas extras por download (padrão: 3)")
+        print()
+        print("Exemplo:")
+        print("  python download_video.py https://youtu.be/ID1 https://youtu.be/ID2 downloads -a -r 10M")
+        sys.exit(1)
+
+    urls = []
+    output_dir = "."
+    audio_only = False
+    max_concurrent = 3
+    rate_limit = None
+    concurrent_fragments = 4
+    retries = 3
+
+    # Parse argumentos
+    args = sys.argv[1:]
+    i = 0
+    while i < len(args):
+        if args[i] in ("-a", "--audio-only"):
+            audio_only = True
+            i += 1
+        elif args[i] in ("-j", "--jobs"):
+            max_concurrent = int(args[i + 1])
+            i += 2
+        elif args[i] in ("-r", "--limit-rate"):
+            rate_limit = parse_rate(args[i + 1])
+            i += 2
+        elif args[i] in ("-N", "--fragments"):
+            concurrent_fragments = int(args[i + 1])
+            i += 2
+        elif args[i] == "--retries":
+            retries = int(args[i + 1])
+            i += 2
+        elif "://" in args[i]:
+            urls.append(args[i])
+            i += 1
+        else:
+            output_dir = args[i]
+            i += 1
+
+    if not urls:
+        print("Erro: nenhuma URL informada")
         sys.exit(1)
 
-    url = sys.argv[1]
-    output_dir = sys.argv[2] if len(sys.argv) > 2 else "."
+    print(f"Baixando {len(urls)} URL(s) para {output_dir}")
 
-    print(f"Baixando: {url}")
-    print(f"Destino: {output_dir}")
+    manager = DownloadManager(
+        max_concurrent=max_concurrent,
+        rate_limit=rate_limit,
+        retries=retries,
+        concurrent_fragments=concurrent_fragments,
+        on_progress=print_progress
+    )
+    jobs = manager.download_all([DownloadJob(url, output_dir, audio_only) for url in urls])
 
-    success = download_video(url, output_dir)
-    sys.exit(0 if success else 1)
+    print()
+    for job in jobs:
+        print(f"{'OK' if job.error is None else 'ERRO'}: {job.url} -> {job.path or job.error}")
+    sys.exit(0 if all(job.error is None for job in jobs) else 1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Instrumentação do pipeline de transcrição.
+
+PipelineMetrics acumula o tempo de parede de cada estágio (ffprobe, ffmpeg,
+carregamento do modelo, inferência, limpeza), a duração do áudio processado,
+o pico de RSS/VRAM (do processo e do maior processo filho, ex.: um processo
+do ASRProcessPool) e os bytes gravados em arquivos temporários. O resultado
+de uma execução pode ser gravado como uma linha JSON (append) ou como texto
+no formato de exposição do Prometheus (ex.: para o textfile collector do
+node_exporter).
+
+Uso:
+    metrics = PipelineMetrics(labels={"model": "parakeet"})
+    with metrics.stage("ffprobe"):
+        duration = get_audio_duration(path)
+    metrics.write_jsonl("metrics.jsonl")
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Iterable, Iterator
+
+PROMETHEUS_PREFIX = "agent_youtube"
+
+
+def _max_rss_mb(who: int) -> float:
+    import resource
+    max_rss = resource.getrusage(who).ru_maxrss
+    # ru_maxrss é em bytes no macOS e em KB no Linux
+    return max_rss / 1e6 if sys.platform == "darwin" else max_rss / 1e3
+
+
+def get_peak_rss_mb() -> float:
+    """Pico de RSS do processo em MB (getrusage)."""
+    import resource
+    return _max_rss_mb(resource.RUSAGE_SELF)
+
+
+def get_peak_children_rss_mb() -> float:
+    """
+    Pico de RSS em MB do maior processo filho já encerrado (getrusage).
+
+    Inclui os processos do ASRProcessPool (cada um com o seu modelo) e o
+    ffmpeg, mas só depois que terminam: encerre o pool antes de ler.
+    """
+    import resource
+    return _max_rss_mb(resource.RUSAGE_CHILDREN)
+
+
+def get_peak_vram_mb() -> float | None:
+    """Pico de VRAM alocada pelo PyTorch em MB, ou None sem GPU."""
+    try:
+        import torch
+    except ImportError:
+        return None
+    if not torch.cuda.is_available():
+        return None
+    return torch.cuda.max_memory_allocated() / 1e6
+
+
+def measure(metrics: "PipelineMetrics", stage: str):
+    """metrics.stage(stage), ou um contexto vazio se metrics for None."""
+    return metrics.stage(stage) if metrics is not None else nullcontext()
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class PipelineMetrics:
+    """Métricas de uma execução do pipeline, seguras para várias threads."""
+
+    def __init__(self, labels: dict = None):
+        """
+        Args:
+            labels: Rótulos da execução (ex.: model, mode), repetidos na saída
+        """
+        self.labels = dict(labels or {})
+        self.stages = {}
+        self.counters = {}
+        self.started_at = time.time()
+        self.wall_seconds = None
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.reset_peak_memory_stats()
+        except ImportError:
+            pass
+
+    def add_time(self, stage: str, seconds: float):
+        """Soma seconds ao tempo do estágio."""
+        with self._lock:
+            entry = self.stages.setdefault(stage, {"seconds": 0.0, "count": 0})
+            entry["seconds"] += seconds
+            entry["count"] += 1
+
+    @contextmanager
+    def stage(self, name: str):
+        """Mede o tempo de parede do bloco como uma chamada do estágio."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def timed_iter(self, stage: str, items: Iterable) -> Iterator:
+        """
+        Repassa os itens medindo o tempo de espera por cada um.
+
+        Com geradores em streaming (ex.: iter_audio_chunks), é o tempo em que
+        o consumidor ficou parado esperando o ffmpeg.
+        """
+        items = iter(items)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(items)
+            except StopIteration:
+                self.add_time(stage, time.perf_counter() - start)
+                return
+            self.add_time(stage, time.perf_counter() - start)
+            yield item
+
+    def add(self, counter: str, value: float):
+        """Incrementa um contador (ex.: audio_seconds, temp_bytes_written)."""
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def finish(self):
+        """Fecha a medição do tempo total da execução."""
+        self.wall_seconds = time.perf_counter() - self._start
+
+    @property
+    def rtf(self) -> float | None:
+        """Real-time factor: tempo total / duração do áudio processado."""
+        audio_seconds = self.counters.get("audio_seconds")
+        if not audio_seconds:
+            return None
+        wall_seconds = self.wall_seconds if self.wall_seconds is not None else time.perf_counter() - self._start
+        return wall_seconds / audio_seconds
+
+    def to_dict(self) -> dict:
+        """Registro da execução (uma linha do JSON lines)."""
+        with self._lock:
+            stages = {name: dict(entry) for name, entry in self.stages.items()}
+            counters = dict(self.counters)
+        return {
+            "timestamp": self.started_at,
+            "labels": self.labels,
+            "wall_seconds": self.wall_seconds,
+            "rtf": self.rtf,
+            "stages": stages,
+            "counters": counters,
+            "peak_rss_mb": get_peak_rss_mb(),
+            "peak_children_rss_mb": get_peak_children_rss_mb(),
+            "peak_vram_mb": get_peak_vram_mb(),
+        }
+
+    def write_jsonl(self, path: str):
+        """Acrescenta o registro da execução como uma linha JSON."""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(self.to_dict(), ensure_ascii=False) + "\n")
+
+    def to_prometheus(self) -> str:
+        """Métricas no formato de exposição de texto do Prometheus."""
+        data = self.to_dict()
+        base_labels = [f'{key}="{_escape_label(value)}"' for key, value in sorted(self.labels.items())]
+
+        def sample(name: str, value, **labels) -> str:
+            pairs = base_labels + [f'{key}="{_escape_label(val)}"' for key, val in labels.items()]
+            label_text = "{" + ",".join(pairs) + "}" if pairs else ""
+            return f"{PROMETHEUS_PREFIX}_{name}{label_text} {value}"
+
+        lines = [
+            f"# HELP {PROMETHEUS_PREFIX}_stage_seconds_total Tempo de parede por estágio",
+            f"# TYPE {PROMETHEUS_PREFIX}_stage_seconds_total counter",
+        ]
+        lines += [sample("stage_seconds_total", f"{entry['seconds']:.6f}", stage=name)
+                  for name, entry in sorted(data["stages"].items())]
+        lines += [
+            f"# HELP {PROMETHEUS_PREFIX}_stage_calls_total Chamadas por estágio",
+            f"# TYPE {PROMETHEUS_PREFIX}_stage_calls_total counter",
+        ]
+        lines += [sample("stage_calls_total", entry["count"], stage=name)
+                  for name, entry in sorted(data["stages"].items())]
+
+        for name, value in sorted(data["counters"].items()):
+            lines.append(f"# TYPE {PROMETHEUS_PREFIX}_{name}_total counter")
+            lines.append(sample(f"{name}_total", value))
+
+        gauges = {
+            "wall_seconds": data["wall_seconds"],
+            "rtf": data["rtf"],
+            "peak_rss_bytes": data["peak_rss_mb"] * 1e6,
+            "peak_children_rss_bytes": data["peak_children_rss_mb"] * 1e6,
+            "peak_vram_bytes": data["peak_vram_mb"] * 1e6 if data["peak_vram_mb"] is not None else None,
+        }
+        for name, value in gauges.items():
+            if value is not None:
+                lines.append(f"# TYPE {PROMETHEUS_PREFIX}_{name} gauge")
+                lines.append(sample(name, f"{value:.6g}"))
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """Grava as métricas em formato Prometheus (escrita atômica)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
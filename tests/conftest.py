@@ -0,0 +1,16 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import asr_worker  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def batch_size_cache(tmp_path, monkeypatch) -> Path:
+    """Cache de batch sizes em tmp_path, nunca o de ~/.cache."""
+    path = tmp_path / "batch_sizes.json"
+    monkeypatch.setattr(asr_worker, "BATCH_SIZE_CACHE_PATH", path)
+    return path
@@ -0,0 +1,100 @@
+"""
+Testes do ASRWorker com um modelo stub: carga única e recarga por memória.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import asr_worker  # noqa: E402
+from asr_worker import ASRWorker, TranscriptionResult, get_asr_worker  # noqa: E402
+
+
+class StubModel:
+    def transcribe(self, audio: list, **kwargs) -> list:
+        return [TranscriptionResult(str(item)) for item in audio]
+
+
+class CountingLoader:
+    """model_loader que conta quantas vezes o modelo foi carregado."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, model_name: str, device: str) -> StubModel:
+        self.calls += 1
+        return StubModel()
+
+
+@pytest.fixture
+def memory_mb(monkeypatch) -> list:
+    """Memória reportada ao worker; o teste altera memory_mb[0]."""
+    memory = [1000.0]
+    monkeypatch.setattr(asr_worker, "get_memory_usage_mb", lambda device="cpu": memory[0])
+    return memory
+
+
+def test_model_is_loaded_once_for_many_jobs(memory_mb):
+    loader = CountingLoader()
+    worker = ASRWorker("stub", device="cpu", model_loader=loader)
+    try:
+        outputs = [worker.transcribe([f"chunk{i}"]) for i in range(5)]
+    finally:
+        worker.stop()
+
+    assert [output[0].text for output in outputs] == [f"chunk{i}" for i in range(5)]
+    assert loader.calls == worker.load_count == 1
+    assert worker.job_count == 5
+
+
+def test_model_is_reloaded_only_above_the_threshold(memory_mb):
+    loader = CountingLoader()
+    worker = ASRWorker("stub", device="cpu", model_loader=loader, reload_threshold_mb=500)
+    try:
+        worker.transcribe(["a"])
+        memory_mb[0] = 1400.0  # +400 MB: abaixo do limite
+        worker.transcribe(["b"])
+        assert worker.load_count == 1
+
+        memory_mb[0] = 1600.0  # +600 MB: recarrega
+        worker.transcribe(["c"])
+        assert worker.load_count == 2
+
+        # A nova base é a memória depois da recarga
+        worker.transcribe(["d"])
+        assert worker.load_count == 2
+    finally:
+        worker.stop()
+
+
+def test_errors_reach_the_caller_and_keep_the_worker_alive(memory_mb):
+    class FailingModel(StubModel):
+        def transcribe(self, audio: list, **kwargs) -> list:
+            if audio == ["bad"]:
+                raise RuntimeError("falha no chunk")
+            return super().transcribe(audio)
+
+    worker = ASRWorker("stub", device="cpu", model_loader=lambda name, device: FailingModel())
+    try:
+        with pytest.raises(RuntimeError, match="falha no chunk"):
+            worker.transcribe(["bad"])
+        assert worker.transcribe(["ok"])[0].text == "ok"
+    finally:
+        worker.stop()
+
+
+def test_get_asr_worker_shares_one_worker_per_model(memory_mb):
+    loader = CountingLoader()
+    first = get_asr_worker("stub-shared", device="cpu", model_loader=loader)
+    try:
+        second = get_asr_worker("stub-shared", device="cpu", model_loader=loader)
+        first.transcribe(["a"])
+        second.transcribe(["b"])
+
+        assert first is second
+        assert loader.calls == 1
+    finally:
+        first.stop()
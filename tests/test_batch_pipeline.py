@@ -0,0 +1,78 @@
+"""
+Teste do pipeline em lote com arquivos locais e o modelo stub do bench.py.
+"""
+
+import json
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from batch_pipeline import PipelineItem, run_batch_pipeline  # noqa: E402
+from bench import load_stub_model  # noqa: E402
+
+pytestmark = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg não instalado")
+
+DURATIONS = (3, 5)
+
+
+@pytest.fixture
+def videos(tmp_path) -> list[Path]:
+    paths = []
+    for seconds in DURATIONS:
+        path = tmp_path / f"video_{seconds}s.mp4"
+        subprocess.run([
+            "ffmpeg", "-v", "error",
+            "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+            "-c:a", "aac", "-y", str(path)
+        ], check=True)
+        paths.append(path)
+    return paths
+
+
+@pytest.fixture
+def status_file(tmp_path, videos) -> Path:
+    path = tmp_path / "videos_status.json"
+    entries = [
+        {"id": path.stem, "file_path": path.name, "status": "ready", "has_transcription": False}
+        for path in videos
+    ]
+    entries.append({"id": "missing", "file_path": "missing.mp4", "status": "ready", "has_transcription": False})
+    path.write_text(json.dumps({"videos": entries}), encoding="utf-8")
+    return path
+
+
+def test_local_files_are_transcribed_and_missing_files_fail_alone(tmp_path, videos, status_file, batch_size_cache):
+    items = [PipelineItem(str(path), video_id=path.stem) for path in videos]
+    items.append(PipelineItem(str(tmp_path / "missing.mp4"), video_id="missing"))
+
+    results = run_batch_pipeline(
+        items,
+        output_dir=str(tmp_path / "downloads"),
+        model_loader=load_stub_model,
+        status_file=str(status_file),
+        chunk_duration=60
+    )
+
+    by_source = {result["source"]: result for result in results}
+    assert len(by_source) == len(items)
+
+    missing = by_source[str(tmp_path / "missing.mp4")]
+    assert missing["error"].startswith("download: Arquivo não encontrado")
+    assert missing["transcript_path"] is None
+
+    for path, seconds in zip(videos, DURATIONS):
+        result = by_source[str(path)]
+        assert result["error"] is None
+        assert result["transcript_path"] == str(path.with_suffix(".txt"))
+        # O stub "transcreve" a duração do áudio
+        assert Path(result["transcript_path"]).read_text(encoding="utf-8") == f"{seconds:.1f}s de áudio"
+
+    status = {video["id"]: video["has_transcription"] for video in json.loads(status_file.read_text())["videos"]}
+    assert status == {"video_3s": True, "video_5s": True, "missing": False}
+    # O batch do stub não é gravado na chave do modelo real
+    assert not batch_size_cache.exists()
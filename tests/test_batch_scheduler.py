@@ -0,0 +1,123 @@
+"""
+Testes do BatchScheduler com um worker falso, sem modelo.
+
+O worker falso dá OOM acima de um tamanho de batch, como o NeMo em uma GPU
+sem memória livre. O caminho do ASRProcessPool usa o stub do bench.py.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from asr_worker import (  # noqa: E402
+    DEFAULT_MODEL, MAX_AUTO_BATCH_SIZE, ASRProcessPool, ASRWorker, BatchScheduler, TranscriptionResult
+)
+from bench import load_stub_model  # noqa: E402
+from transcribe_chunks import SAMPLE_RATE  # noqa: E402
+
+
+class FakeWorker:
+    """Worker que devolve as entradas como texto e dá OOM acima de max_ok."""
+
+    def __init__(self, max_ok: int = None):
+        self.model_name = "fake"
+        self.device = "cpu"
+        self.max_ok = max_ok
+        self.batches = []
+
+    def transcribe(self, audio: list, batch_size: int = None, **kwargs) -> list:
+        self.batches.append(len(audio))
+        if self.max_ok is not None and len(audio) > self.max_ok:
+            raise RuntimeError("CUDA out of memory. Tried to allocate 2.00 GiB")
+        return [TranscriptionResult(str(item)) for item in audio]
+
+
+def _scheduler(worker, **kwargs) -> BatchScheduler:
+    # Orçamento de sobra: a estimativa de memória é sempre MAX_AUTO_BATCH_SIZE
+    return BatchScheduler(
+        worker,
+        chunk_duration=1,
+        ram_budget_mb=1e6,
+        mb_per_audio_second=1.0,
+        **kwargs
+    )
+
+
+def test_oom_halves_the_batch_and_keeps_the_order():
+    worker = FakeWorker(max_ok=8)
+    scheduler = _scheduler(worker)
+
+    outputs = scheduler.transcribe(list(range(40)))
+
+    assert [result.text for result in outputs] == [str(i) for i in range(40)]
+    assert worker.batches[:3] == [32, 16, 8]
+    assert scheduler.batch_size == 8
+
+
+def test_oom_limits_the_next_run_to_the_size_that_worked(batch_size_cache):
+    _scheduler(FakeWorker(max_ok=8)).transcribe(list(range(40)))
+
+    cache = json.loads(batch_size_cache.read_text(encoding="utf-8"))
+    key = _scheduler(FakeWorker()).cache_key
+    assert cache["oom"][key] == 16
+    assert cache[key] == 8
+    assert _scheduler(FakeWorker()).initial_batch_size() == 8
+
+
+def test_max_batch_size_does_not_shrink_later_runs():
+    _scheduler(FakeWorker(), max_batch_size=1).transcribe(list(range(5)))
+
+    assert _scheduler(FakeWorker()).initial_batch_size() == MAX_AUTO_BATCH_SIZE
+
+
+def test_short_input_does_not_shrink_later_runs(batch_size_cache):
+    # Um único batch parcial (3 < 32) não diz nada sobre a memória
+    _scheduler(FakeWorker()).transcribe(list(range(3)))
+
+    assert not batch_size_cache.exists()
+    assert _scheduler(FakeWorker()).initial_batch_size() == MAX_AUTO_BATCH_SIZE
+
+
+def test_full_batches_are_remembered(batch_size_cache):
+    scheduler = _scheduler(FakeWorker())
+    scheduler.transcribe(list(range(MAX_AUTO_BATCH_SIZE + 3)))
+
+    cache = json.loads(batch_size_cache.read_text(encoding="utf-8"))
+    assert cache == {scheduler.cache_key: MAX_AUTO_BATCH_SIZE}
+
+
+def test_custom_model_loader_does_not_touch_the_real_model_entry(batch_size_cache):
+    # O stub roda com o model_name do modelo real: o batch dele não vale para o real
+    worker = ASRWorker(DEFAULT_MODEL, device="cpu", model_loader=lambda name, device: FakeWorker())
+    try:
+        _scheduler(worker).transcribe(list(range(MAX_AUTO_BATCH_SIZE + 3)))
+    finally:
+        worker.stop()
+
+    assert not batch_size_cache.exists()
+
+
+@pytest.fixture(scope="module")
+def process_pool():
+    pool = ASRProcessPool("stub", workers=2, threads_per_worker=1, model_loader=load_stub_model)
+    yield pool
+    pool.stop()
+
+
+def test_process_pool_batch_is_one_chunk_per_process(process_pool, batch_size_cache):
+    scheduler = _scheduler(process_pool)
+    assert scheduler.initial_batch_size() == process_pool.workers
+    assert _scheduler(process_pool, max_batch_size=1).initial_batch_size() == 1
+
+    # Durações diferentes: a ordem das saídas precisa seguir a das entradas
+    chunks = [np.zeros(SAMPLE_RATE * seconds, dtype=np.float32) for seconds in (3, 1, 2, 4, 5)]
+    outputs = scheduler.transcribe(chunks)
+
+    assert [result.text for result in outputs] == [f"{seconds:.1f}s de áudio" for seconds in (3, 1, 2, 4, 5)]
+    # O número de processos não é um limite de memória
+    assert not batch_size_cache.exists()
@@ -0,0 +1,136 @@
+"""
+Testes do DownloadManager: limite de concorrência, divisão da banda e
+retry com o yt-dlp contra um python -m http.server local.
+"""
+
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from download_video import DownloadJob, DownloadManager  # noqa: E402
+
+# Cabeçalho ftyp de um MP4 seguido de zeros: o teste só compara os bytes baixados
+MP4_BYTES = bytes.fromhex("0000001c66747970") + b"isom\x00\x00\x02\x00isomiso2mp41" + bytes(4096)
+
+
+class RecordingManager(DownloadManager):
+    """Troca o yt-dlp por uma espera, registrando concorrência e banda de cada tentativa."""
+
+    def __init__(self, *args, duration: float = 0.05, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.duration = duration
+        self.running = 0
+        self.max_running = 0
+        self.rates = []
+        self._record_lock = threading.Lock()
+
+    def _attempt(self, job: DownloadJob) -> str:
+        with self._record_lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            self.rates.append(self.rate_limit_per_job)
+        time.sleep(self.duration)
+        with self._record_lock:
+            self.running -= 1
+        return str(Path(job.output_dir) / "video.mp4")
+
+
+def test_download_respects_max_concurrent_across_threads(tmp_path):
+    manager = RecordingManager(max_concurrent=2)
+    jobs = [DownloadJob(f"https://example.com/{i}", str(tmp_path)) for i in range(6)]
+    threads = [threading.Thread(target=manager.download, args=(job,)) for job in jobs]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert manager.max_running == 2
+    assert all(job.path for job in jobs)
+
+
+def test_single_download_gets_the_whole_rate_limit(tmp_path):
+    manager = RecordingManager(max_concurrent=4, rate_limit=4_000_000)
+    manager.download(DownloadJob("https://example.com/a", str(tmp_path)))
+
+    assert manager.rates == [4_000_000]
+
+
+def test_rate_limit_is_split_between_pending_downloads(tmp_path):
+    manager = RecordingManager(max_concurrent=4, rate_limit=4_000_000)
+    manager.download_all([DownloadJob(f"https://example.com/{i}", str(tmp_path)) for i in range(2)])
+
+    assert manager.rates == [2_000_000, 2_000_000]
+    assert manager.rate_limit_per_job == 4_000_000
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(scope="module")
+def http_server(tmp_path_factory):
+    """python -m http.server servindo um MP4 pequeno; devolve a URL base."""
+    if shutil.which("yt-dlp") is None:
+        pytest.skip("yt-dlp não instalado")
+    root = tmp_path_factory.mktemp("www")
+    (root / "clip.mp4").write_bytes(MP4_BYTES)
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "http.server", str(port), "--bind", "127.0.0.1", "--directory", str(root)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.05)
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def test_download_from_http_server(tmp_path, http_server):
+    manager = DownloadManager(retries=2, backoff=0.01)
+    job = manager.download(DownloadJob(f"{http_server}/clip.mp4", str(tmp_path)))
+
+    assert job.error is None
+    assert job.attempts == 1
+    assert Path(job.path).read_bytes() == MP4_BYTES
+
+
+def test_http_404_is_not_retried(tmp_path, http_server):
+    manager = DownloadManager(retries=2, backoff=0.01)
+    job = manager.download(DownloadJob(f"{http_server}/missing.mp4", str(tmp_path)))
+
+    assert "404" in job.error
+    assert job.attempts == 1
+    assert job.path is None
+
+
+def test_refused_connection_is_retried(tmp_path):
+    if shutil.which("yt-dlp") is None:
+        pytest.skip("yt-dlp não instalado")
+    events = []
+    manager = DownloadManager(retries=2, backoff=0.01, on_progress=events.append)
+    job = manager.download(DownloadJob(f"http://127.0.0.1:{_free_port()}/clip.mp4", str(tmp_path)))
+
+    assert job.path is None
+    assert job.attempts == 3
+    assert [event.status for event in events] == ["retrying", "retrying", "error"]
@@ -0,0 +1,23 @@
+"""
+Testes das métricas do pipeline.
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pipeline_metrics import PROMETHEUS_PREFIX, PipelineMetrics  # noqa: E402
+
+
+def test_peak_rss_includes_finished_child_processes():
+    # Um filho com ~200 MB residentes, como um processo do ASRProcessPool com o modelo
+    subprocess.run([sys.executable, "-c", "data = b'x' * 200_000_000"], check=True)
+
+    metrics = PipelineMetrics()
+    metrics.finish()
+    data = metrics.to_dict()
+
+    assert data["peak_children_rss_mb"] >= 150
+    assert f"{PROMETHEUS_PREFIX}_peak_children_rss_bytes " in metrics.to_prometheus()
@@ -0,0 +1,164 @@
+"""
+Teste de kill/restart dos jobs retomáveis com um modelo stub.
+
+O stub "morre" depois de um número de chunks. Ao retomar, nenhum chunk de um
+batch concluído pode ser transcrito de novo; só os do batch interrompido.
+"""
+
+import hashlib
+import json
+import shutil
+import subprocess
+import sys
+import wave
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from asr_worker import ASRWorker, TranscriptionResult  # noqa: E402
+from transcribe_chunks import transcribe_audio_chunked  # noqa: E402
+
+pytestmark = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg não instalado")
+
+CHUNK_DURATION = 10
+NUM_CHUNKS = 8
+BATCH_SIZE = 2
+SAMPLE_RATE = 16000
+# Não divide o overlap (0.5 s): palavras só coincidem se o chunk começar na mesma amostra
+WORD_SECONDS = 0.3
+
+
+class SimulatedKill(Exception):
+    pass
+
+
+class CrashingStubModel:
+    """Stub que identifica cada chunk pelo hash do PCM e falha após crash_after chunks."""
+
+    def __init__(self, crash_after: int = None):
+        self.crash_after = crash_after
+        self.transcribed = []
+        self.failed_batch = None
+
+    def transcribe(self, audio: list, timestamps: bool = False, **kwargs) -> list:
+        samples = [self._samples(item) for item in audio]
+        keys = [self._key(item) for item in samples]
+        outputs = []
+        for key, item in zip(keys, samples):
+            if self.crash_after is not None and len(self.transcribed) >= self.crash_after:
+                self.failed_batch = keys
+                raise SimulatedKill("processo morto no meio do batch")
+            self.transcribed.append(key)
+            outputs.append(TranscriptionResult(key, {"word": self._words(item)} if timestamps else None))
+        return outputs
+
+    @staticmethod
+    def _samples(audio) -> np.ndarray:
+        if isinstance(audio, (str, Path)):
+            with wave.open(str(audio)) as f:
+                audio = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16) / 32768.0
+        return np.asarray(audio, dtype=np.float32)
+
+    @staticmethod
+    def _key(samples: np.ndarray) -> str:
+        return hashlib.sha256(samples.tobytes()).hexdigest()[:16]
+
+    @classmethod
+    def _words(cls, samples: np.ndarray) -> list[dict]:
+        # Uma "palavra" por bloco de WORD_SECONDS, identificada pelo PCM
+        block = int(WORD_SECONDS * SAMPLE_RATE)
+        return [
+            {"word": cls._key(samples[i:i + block])[:6], "start": i / SAMPLE_RATE, "end": (i + block) / SAMPLE_RATE}
+            for i in range(0, len(samples) - block + 1, block)
+        ]
+
+
+@pytest.fixture(scope="module")
+def audio_path(tmp_path_factory) -> Path:
+    # Ruído determinístico: cada chunk tem um PCM diferente
+    path = tmp_path_factory.mktemp("audio") / "noise.wav"
+    subprocess.run([
+        "ffmpeg", "-v", "error",
+        "-f", "lavfi", "-i", f"anoisesrc=duration={NUM_CHUNKS * CHUNK_DURATION}:seed=7",
+        "-ar", "16000", "-ac", "1", "-y", str(path)
+    ], check=True)
+    return path
+
+
+def _transcribe(audio_path: Path, output_file: Path, model: CrashingStubModel, in_memory: bool, resumable: bool,
+                output_format: str = "txt", vad: bool = False):
+    worker = ASRWorker("stub", device="cpu", model_loader=lambda name, device: model)
+    try:
+        return transcribe_audio_chunked(
+            audio_path,
+            output_file=output_file,
+            chunk_duration=CHUNK_DURATION,
+            batch_size=BATCH_SIZE,
+            worker=worker,
+            in_memory=in_memory,
+            resumable=resumable,
+            output_format=output_format,
+            vad=vad
+        )
+    finally:
+        worker.stop()
+
+
+@pytest.mark.parametrize("in_memory", [True, False], ids=["in_memory", "files"])
+@pytest.mark.parametrize("crash_after", [3, 5])
+def test_resume_after_kill_redoes_at_most_the_interrupted_batch(tmp_path, audio_path, in_memory, crash_after):
+    reference = CrashingStubModel()
+    expected = _transcribe(audio_path, tmp_path / "reference.txt", reference, in_memory, resumable=False)
+    assert len(reference.transcribed) == NUM_CHUNKS
+
+    output_file = tmp_path / "job.txt"
+    crashing = CrashingStubModel(crash_after=crash_after)
+    with pytest.raises(SimulatedKill):
+        _transcribe(audio_path, output_file, crashing, in_memory, resumable=True)
+
+    manifest = json.loads(output_file.with_suffix(".job.json").read_text(encoding="utf-8"))
+    done = [chunk for chunk in manifest["chunks"] if chunk["status"] == "done"]
+    # Só batches inteiros são registrados
+    assert len(done) == crash_after // BATCH_SIZE * BATCH_SIZE
+
+    resumed = CrashingStubModel()
+    text = _transcribe(audio_path, output_file, resumed, in_memory, resumable=True)
+
+    assert text == expected
+    counts = Counter(crashing.transcribed + resumed.transcribed)
+    assert set(counts) == set(reference.transcribed)
+    redone = {key for key, count in counts.items() if count > 1}
+    assert redone <= set(crashing.failed_batch)
+    assert len(redone) <= BATCH_SIZE - 1
+
+
+def test_txt_job_is_not_resumed_as_subtitles(tmp_path, audio_path):
+    # Os chunks de um job em txt não têm palavras: legendas precisam refazê-los
+    output_file = tmp_path / "job.txt"
+    with pytest.raises(SimulatedKill):
+        _transcribe(audio_path, output_file, CrashingStubModel(crash_after=4), True, resumable=True)
+
+    resumed = CrashingStubModel()
+    _transcribe(audio_path, output_file, resumed, True, resumable=True, output_format="srt")
+
+    assert len(resumed.transcribed) == NUM_CHUNKS
+
+
+def test_vad_resume_matches_the_uninterrupted_run(tmp_path, audio_path):
+    # O primeiro chunk retomado precisa do overlap antes do corte, como na execução contínua
+    reference_file = tmp_path / "reference.json"
+    _transcribe(audio_path, reference_file, CrashingStubModel(), True, resumable=False, output_format="json", vad=True)
+
+    output_file = tmp_path / "job.json"
+    with pytest.raises(SimulatedKill):
+        _transcribe(audio_path, output_file, CrashingStubModel(crash_after=3), True, resumable=True,
+                    output_format="json", vad=True)
+    _transcribe(audio_path, output_file, CrashingStubModel(), True, resumable=True, output_format="json", vad=True)
+
+    resumed = json.loads(output_file.read_text(encoding="utf-8"))
+    reference = json.loads(reference_file.read_text(encoding="utf-8"))
+    assert resumed == reference
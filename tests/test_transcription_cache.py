@@ -0,0 +1,78 @@
+"""
+Testes do cache de transcrições por chunk.
+
+Os chunks do mesmo áudio precisam ter a mesma chave em arquivos WAV e em
+memória (f32le ou s16le), mesmo quando a fonte não é 16 kHz mono int16.
+"""
+
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from asr_worker import ASRWorker, TranscriptionResult  # noqa: E402
+from transcribe_chunks import transcribe_audio_chunked  # noqa: E402
+from transcription_cache import TranscriptionCache  # noqa: E402
+
+NUM_CHUNKS = 4
+CHUNK_DURATION = 10
+
+
+class StubModel:
+    def transcribe(self, audio: list, **kwargs) -> list:
+        return [TranscriptionResult("stub") for _ in audio]
+
+
+@pytest.fixture(scope="module")
+def audio_path(tmp_path_factory) -> Path:
+    if shutil.which("ffmpeg") is None:
+        pytest.skip("ffmpeg não instalado")
+    # Estéreo, 44.1 kHz e float: a conversão para 16 kHz mono int16 fica com o ffmpeg
+    path = tmp_path_factory.mktemp("audio") / "noise.wav"
+    subprocess.run([
+        "ffmpeg", "-v", "error",
+        "-f", "lavfi", "-i", f"anoisesrc=duration={NUM_CHUNKS * CHUNK_DURATION}:seed=7:amplitude=0.5",
+        "-ar", "44100", "-ac", "2", "-c:a", "pcm_f32le", "-y", str(path)
+    ], check=True)
+    return path
+
+
+def _transcribe(audio_path: Path, output_file: Path, cache: TranscriptionCache, **kwargs):
+    worker = ASRWorker("stub", device="cpu", model_loader=lambda name, device: StubModel())
+    try:
+        transcribe_audio_chunked(
+            audio_path,
+            output_file=output_file,
+            chunk_duration=CHUNK_DURATION,
+            worker=worker,
+            cache=cache,
+            **kwargs
+        )
+    finally:
+        worker.stop()
+
+
+@pytest.mark.parametrize("pcm_format", ["f32le", "s16le"])
+def test_in_memory_chunks_hit_the_entries_of_wav_chunks(tmp_path, audio_path, pcm_format):
+    cache_dir = tmp_path / "cache"
+    files_cache = TranscriptionCache(cache_dir)
+    _transcribe(audio_path, tmp_path / "files.txt", files_cache)
+    assert files_cache.misses == NUM_CHUNKS
+
+    memory_cache = TranscriptionCache(cache_dir)
+    _transcribe(audio_path, tmp_path / "memory.txt", memory_cache, in_memory=True, pcm_format=pcm_format)
+    assert (memory_cache.hits, memory_cache.misses) == (NUM_CHUNKS, 0)
+
+
+def test_overwriting_an_entry_does_not_grow_the_tracked_size(tmp_path):
+    cache = TranscriptionCache(tmp_path / "cache")
+    key = cache.key(np.zeros(160, dtype=np.float32), "stub", CHUNK_DURATION)
+    for _ in range(5):
+        cache.put(key, "texto")
+
+    assert cache._size_bytes == cache.size_bytes()
@@ -1,19 +1,54 @@
 #!/usr/bin/env python3
 """
-Script para transcrever áudio MP3 em chunks de 6 minutos usando NVIDIA Parakeet TDT v3.
+Script para transcrever áudio ou vídeo em chunks de 6 minutos usando NVIDIA Parakeet TDT v3.
 Otimizado para máximo uso de GPU através de batch processing.
 
-Uso: python transcribe_chunks.py <arquivo.mp3> [-o output.txt]
+Aceita qualquer container que o ffmpeg leia (mp3, mp4, mkv, webm, m4a, ...)
+ou um stream em stdin ("-"). O áudio é decodificado direto para PCM 16kHz
+mono, sem MP3 intermediário, e a transcrição começa enquanto a entrada ainda
+está sendo lida.
+
+Uso: python transcribe_chunks.py <arquivo|-> [-o output.txt]
 """
 
+import itertools
 import subprocess
 import sys
 import os
 import tempfile
 import shutil
 from pathlib import Path
+from typing import Callable, Iterable, Iterator, NamedTuple
+import numpy as np
 import torch
 
+from asr_worker import DEFAULT_MODEL, ASRProcessPool, ASRWorker, BatchScheduler, get_asr_worker
+from audio_vad import find_silence_cut
+from pipeline_metrics import PipelineMetrics, measure
+from transcription_cache import DEFAULT_CACHE_DIR, TranscriptionCache
+from transcription_job import TranscriptionJob
+from transcript_output import OUTPUT_FORMATS, render_transcript, to_text
+
+SAMPLE_RATE = 16000
+# O PCM em memória passa pela mesma conversão dos chunks WAV (16 kHz mono
+# int16): com f32le o ffmpeg só converte essas amostras para float, então o
+# áudio (e o hash do cache) é o mesmo em arquivos, f32le e s16le
+PCM_FILTER = f"aformat=sample_fmts=s16:sample_rates={SAMPLE_RATE}:channel_layouts=mono"
+# Formatos de PCM aceitos no modo em memória: dtype lido do pipe do ffmpeg
+PCM_FORMATS = {"f32le": np.float32, "s16le": np.int16}
+# Bloco de leitura do pipe de PCM no modo VAD
+VAD_READ_BLOCK_SECONDS = 10
+# Caminho que indica entrada por stdin (ou por um stream passado em input_stream)
+STDIN_PATH = "-"
+
+
+class AudioChunk(NamedTuple):
+    """Chunk de áudio com a sua posição no áudio original."""
+    audio: object   # Caminho do WAV ou array PCM
+    offset: float   # Tempo global (s) da primeira amostra do chunk
+    start: float    # Início da região própria do chunk (s, global)
+    end: float      # Fim da região própria do chunk (s, global)
+
 
 def get_audio_duration(audio_path: str) -> float:
     """Retorna a duração do áudio em segundos usando ffprobe."""
@@ -28,6 +63,332 @@ def get_audio_duration(audio_path: str) -> float:
     return float(result.stdout.strip())
 
 
+def is_stdin(audio_path) -> bool:
+    return str(audio_path) == STDIN_PATH
+
+
+def _input_args(audio_path: str, start_time: float = 0) -> list[str]:
+    """Argumentos de entrada do ffmpeg (seek antes de -i; stdin não tem seek)."""
+    if is_stdin(audio_path):
+        if start_time:
+            raise ValueError("Não é possível iniciar um stream de stdin no meio")
+        return ["-i", "pipe:0"]
+    # Antes de -i: seek na entrada, sem decodificar o início
+    return ["-ss", str(start_time), "-i", str(audio_path)]
+
+
+def iter_audio_chunks(
+    audio_path: str,
+    chunk_duration: int = 360,
+    output_dir: str = None,
+    start_time: float = 0,
+    input_stream=None
+) -> Iterator[str]:
+    """
+    Decodifica o áudio uma única vez e gera chunks WAV 16kHz mono em streaming.
+
+    Usa o segment muxer do ffmpeg em um único processo. Cada chunk é emitido
+    assim que o ffmpeg o fecha (via segment_list em stdout), então o consumidor
+    pode começar a transcrever o chunk 0 enquanto os seguintes são decodificados.
+
+    Args:
+        audio_path: Caminho para o arquivo de áudio
+        chunk_duration: Duração de cada chunk em segundos (padrão: 360 = 6 min)
+        output_dir: Diretório para salvar os chunks
+        start_time: Posição inicial no áudio em segundos (para retomar jobs)
+        input_stream: Stream lido pelo ffmpeg quando audio_path é "-"
+            (padrão: stdin do processo)
+
+    Yields:
+        Caminho de cada chunk, em ordem
+    """
+    if output_dir is None:
+        output_dir = tempfile.mkdtemp(prefix="audio_chunks_")
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    cmd = [
+        "ffmpeg",
+        "-v", "error",
+        *_input_args(audio_path, start_time),
+        "-vn",            # Só o áudio, mesmo de um container de vídeo
+        "-ar", "16000",  # 16kHz para o modelo
+        "-ac", "1",       # Mono
+        # O segment muxer corta pelo timestamp do primeiro pacote depois do
+        # limite: frames de 100 ms com timestamps contados em amostras fazem
+        # os cortes caírem exatamente em múltiplos de chunk_duration
+        "-af", f"aresample={SAMPLE_RATE},asetnsamples=n={SAMPLE_RATE // 10}:p=0,asetpts=N/SR/TB",
+        "-f", "segment",
+        "-segment_time", str(chunk_duration),
+        "-reset_timestamps", "1",
+        "-segment_list", "pipe:1",
+        "-segment_list_type", "flat",
+        "-y",
+        str(output_dir / "chunk_%04d.wav")
+    ]
+
+    process = subprocess.Popen(cmd, stdin=input_stream, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    try:
+        for line in process.stdout:
+            name = line.strip()
+            if name:
+                yield str(output_dir / Path(name).name)
+
+        stderr = process.stderr.read()
+        if process.wait() != 0:
+            raise subprocess.CalledProcessError(process.returncode, cmd, stderr=stderr)
+    finally:
+        # Consumidor parou antes do fim: encerrar o ffmpeg
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
+
+
+def _read_into(stream, buffer: np.ndarray) -> int:
+    """Lê do stream até encher o buffer ou chegar ao EOF. Retorna bytes lidos."""
+    view = memoryview(buffer).cast("B")
+    total = 0
+    while total < len(view):
+        n = stream.readinto(view[total:])
+        if not n:
+            break
+        total += n
+    return total
+
+
+def iter_pcm_chunks(
+    audio_path: str,
+    chunk_duration: int = 360,
+    num_buffers: int = 2,
+    pcm_format: str = "f32le",
+    start_time: float = 0,
+    input_stream=None
+) -> Iterator[np.ndarray]:
+    """
+    Decodifica o áudio para PCM 16kHz mono em memória, sem arquivos temporários.
+
+    O ffmpeg escreve PCM cru em stdout, que é lido diretamente em um conjunto
+    fixo de buffers NumPy reutilizados. O pico de memória fica limitado a
+    num_buffers chunks.
+
+    Atenção: cada array gerado é uma view de um buffer reutilizado e só é
+    válido até o gerador avançar mais num_buffers - 1 vezes.
+
+    Args:
+        audio_path: Caminho para o arquivo de áudio
+        chunk_duration: Duração de cada chunk em segundos (padrão: 360 = 6 min)
+        num_buffers: Quantos chunks podem estar vivos ao mesmo tempo
+        pcm_format: 'f32le' (float32) ou 's16le' (int16, metade dos bytes
+            no pipe, convertido para float32 na leitura)
+        start_time: Posição inicial no áudio em segundos (para retomar jobs)
+        input_stream: Stream lido pelo ffmpeg quando audio_path é "-"
+
+    Yields:
+        Array float32 com as amostras de cada chunk, em ordem
+    """
+    if pcm_format not in PCM_FORMATS:
+        raise ValueError(f"Formato PCM inválido: {pcm_format} (use {', '.join(PCM_FORMATS)})")
+
+    chunk_samples = int(chunk_duration * SAMPLE_RATE)
+    buffers = [np.empty(chunk_samples, dtype=np.float32) for _ in range(max(1, num_buffers))]
+    pipe_dtype = PCM_FORMATS[pcm_format]
+    staging = None if pipe_dtype == np.float32 else np.empty(chunk_samples, dtype=pipe_dtype)
+
+    cmd = [
+        "ffmpeg",
+        "-v", "error",
+        *_input_args(audio_path, start_time),
+        "-vn",
+        "-ar", str(SAMPLE_RATE),
+        "-ac", "1",
+        "-af", PCM_FILTER,
+        "-f", pcm_format,
+        "pipe:1"
+    ]
+
+    process = subprocess.Popen(cmd, stdin=input_stream, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        index = 0
+        while True:
+            buffer = buffers[index % len(buffers)]
+            target = buffer if staging is None else staging
+            num_samples = _read_into(process.stdout, target) // target.itemsize
+            if num_samples == 0:
+                break
+
+            if staging is not None:
+                np.multiply(staging[:num_samples], 1.0 / 32768.0, out=buffer[:num_samples], casting="unsafe")
+
+            yield buffer[:num_samples]
+            index += 1
+            if num_samples < chunk_samples:
+                break
+
+        stderr = process.stderr.read().decode(errors="replace")
+        if process.wait() != 0:
+            raise subprocess.CalledProcessError(process.returncode, cmd, stderr=stderr)
+    finally:
+        # Consumidor parou antes do fim: encerrar o ffmpeg
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
+
+
+def iter_vad_chunks(
+    audio_path: str,
+    chunk_duration: int = 360,
+    overlap: float = 0.5,
+    search_window: float = 30.0,
+    start_time: float = 0,
+    input_stream=None
+) -> Iterator[AudioChunk]:
+    """
+    Decodifica o áudio em memória e corta os chunks em pontos de silêncio.
+
+    Cada corte é feito no trecho mais silencioso (energia por frame, ver
+    audio_vad.py) dos últimos search_window segundos antes de chunk_duration.
+    Cada chunk inclui overlap segundos de áudio antes e depois da sua região
+    própria, para que palavras na borda apareçam inteiras em algum chunk.
+
+    O PCM é lido em um buffer circular de tamanho fixo (um chunk mais os
+    overlaps); cada chunk gerado é uma cópia, válida enquanto for usada.
+
+    Args:
+        audio_path: Caminho para o arquivo de áudio
+        chunk_duration: Duração máxima da região própria de cada chunk (s)
+        overlap: Sobreposição em segundos de cada lado do corte
+        search_window: Janela (s) antes do limite onde procurar o silêncio
+        start_time: Início da região própria do primeiro chunk em segundos
+            (para retomar jobs; o overlap antes dele também é decodificado)
+        input_stream: Stream lido pelo ffmpeg quando audio_path é "-"
+
+    Yields:
+        AudioChunk com o array PCM float32 e os tempos globais
+    """
+    chunk_samples = int(chunk_duration * SAMPLE_RATE)
+    overlap_samples = int(overlap * SAMPLE_RATE)
+    search_samples = int(min(search_window, chunk_duration / 2) * SAMPLE_RATE)
+    block_samples = VAD_READ_BLOCK_SECONDS * SAMPLE_RATE
+
+    # Ao retomar, decodificar também o overlap antes do ponto de retomada:
+    # o primeiro chunk fica igual ao da execução sem interrupção
+    resume_sample = round(start_time * SAMPLE_RATE)
+    lead_samples = min(overlap_samples, resume_sample)
+    decode_start = resume_sample - lead_samples
+
+    buffer = np.empty(chunk_samples + 2 * overlap_samples + block_samples, dtype=np.float32)
+    filled = 0             # Amostras válidas no buffer
+    buffer_offset = 0      # Índice (em amostras desde decode_start) de buffer[0]
+    cut = lead_samples     # Início da região própria do chunk atual
+    eof = False
+
+    cmd = [
+        "ffmpeg",
+        "-v", "error",
+        *_input_args(audio_path, decode_start / SAMPLE_RATE),
+        "-vn",
+        "-ar", str(SAMPLE_RATE),
+        "-ac", "1",
+        "-af", PCM_FILTER,
+        "-f", "f32le",
+        "pipe:1"
+    ]
+
+    def to_seconds(sample: int) -> float:
+        return (decode_start + sample) / SAMPLE_RATE
+
+    process = subprocess.Popen(cmd, stdin=input_stream, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        while True:
+            # Ler até ter a região própria completa mais o overlap depois do corte
+            needed = (cut - buffer_offset) + chunk_samples + overlap_samples
+            while not eof and filled < needed:
+                block = buffer[filled:min(len(buffer), filled + block_samples)]
+                num_samples = _read_into(process.stdout, block) // block.itemsize
+                filled += num_samples
+                eof = num_samples < len(block)
+
+            remaining = buffer_offset + filled - cut
+            if remaining <= 0:
+                break
+
+            last = eof and remaining <= chunk_samples + overlap_samples
+            if last:
+                next_cut = buffer_offset + filled
+            else:
+                search_end = cut + chunk_samples
+                search_start = search_end - search_samples
+                window = buffer[search_start - buffer_offset:search_end - buffer_offset]
+                next_cut = search_start + find_silence_cut(window, SAMPLE_RATE)
+
+            audio_start = max(cut - overlap_samples, buffer_offset)
+            audio_end = min(next_cut + overlap_samples, buffer_offset + filled)
+            yield AudioChunk(
+                audio=buffer[audio_start - buffer_offset:audio_end - buffer_offset].copy(),
+                offset=to_seconds(audio_start),
+                start=to_seconds(cut),
+                end=to_seconds(next_cut)
+            )
+
+            if last:
+                break
+
+            # Descartar o que ficou para trás, mantendo o overlap antes do novo corte
+            cut = next_cut
+            keep_from = cut - overlap_samples
+            keep = buffer_offset + filled - keep_from
+            buffer[:keep] = buffer[keep_from - buffer_offset:filled]
+            buffer_offset = keep_from
+            filled = keep
+
+        stderr = process.stderr.read().decode(errors="replace")
+        if process.wait() != 0:
+            raise subprocess.CalledProcessError(process.returncode, cmd, stderr=stderr)
+    finally:
+        # Consumidor parou antes do fim: encerrar o ffmpeg
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
+
+
+def _with_offsets(chunks: Iterable, chunk_duration: int, start_time: float = 0) -> Iterator[AudioChunk]:
+    """Anota chunks de duração fixa com a sua posição no áudio original."""
+    for i, audio in enumerate(chunks):
+        offset = start_time + i * chunk_duration
+        yield AudioChunk(audio=audio, offset=offset, start=offset, end=offset + chunk_duration)
+
+
+def _chunk_seconds(chunk) -> float:
+    """Duração do áudio próprio de um chunk (sem os overlaps do modo VAD)."""
+    audio = chunk.audio if isinstance(chunk, AudioChunk) else chunk
+    if isinstance(audio, (str, Path)):
+        # WAV PCM 16 bits mono gerado pelo ffmpeg (cabeçalho desprezível)
+        seconds = os.path.getsize(audio) / (2 * SAMPLE_RATE)
+    else:
+        seconds = len(audio) / SAMPLE_RATE
+    if isinstance(chunk, AudioChunk):
+        return max(0.0, min(chunk.end, chunk.offset + seconds) - chunk.start)
+    return seconds
+
+
+def _measured_chunks(chunks: Iterable, metrics: PipelineMetrics) -> Iterator:
+    """Repassa os chunks registrando a espera pelo ffmpeg, o áudio e os bytes temporários."""
+    for chunk in metrics.timed_iter("ffmpeg", chunks):
+        metrics.add("audio_seconds", _chunk_seconds(chunk))
+        audio = chunk.audio if isinstance(chunk, AudioChunk) else chunk
+        if isinstance(audio, (str, Path)):
+            metrics.add("temp_bytes_written", os.path.getsize(audio))
+        metrics.add("chunks", 1)
+        yield chunk
+
+
 def split_audio_into_chunks(
     audio_path: str,
     chunk_duration: int = 360,  # 6 minutos em segundos
@@ -44,14 +405,6 @@ def split_audio_into_chunks(
     Returns:
         Lista de caminhos dos chunks gerados
     """
-    audio_path = Path(audio_path)
-
-    if output_dir is None:
-        output_dir = tempfile.mkdtemp(prefix="audio_chunks_")
-
-    output_dir = Path(output_dir)
-    output_dir.mkdir(parents=True, exist_ok=True)
-
     # Obter duração total
     total_duration = get_audio_duration(str(audio_path))
     print(f"Duração total do áudio: {total_duration:.1f}s ({total_duration/60:.1f} min)")
@@ -62,146 +415,350 @@ def split_audio_into_chunks(
 
     chunk_paths = []
 
-    for i in range(num_chunks):
+    for i, chunk_path in enumerate(iter_audio_chunks(audio_path, chunk_duration, output_dir)):
         start_time = i * chunk_duration
-        chunk_path = output_dir / f"chunk_{i:04d}.wav"
-
-        cmd = [
-            "ffmpeg",
-            "-i", str(audio_path),
-            "-ss", str(start_time),
-            "-t", str(chunk_duration),
-            "-ar", "16000",  # 16kHz para o modelo
-            "-ac", "1",       # Mono
-            "-y",
-            str(chunk_path)
-        ]
-
-        subprocess.run(cmd, check=True, capture_output=True, text=True)
-        chunk_paths.append(str(chunk_path))
+        chunk_paths.append(chunk_path)
         print(f"  Chunk {i+1}/{num_chunks}: {start_time}s - {min(start_time + chunk_duration, total_duration):.1f}s")
 
     return chunk_paths
 
 
-def transcribe_chunks_batch(
-    chunk_paths: list[str],
-    model_name: str = "nvidia/parakeet-tdt-0.6b-v3",
-    batch_size: int = None
-) -> list[str]:
+def _hypothesis_words(output) -> list[dict]:
+    """Timestamps de palavras de uma hipótese do NeMo (tempos locais ao chunk)."""
+    timestamp = getattr(output, "timestamp", None)
+    if not isinstance(timestamp, dict):
+        return []
+    return [
+        {"word": word["word"], "start": float(word["start"]), "end": float(word["end"])}
+        for word in timestamp.get("word") or []
+        if "start" in word and "end" in word
+    ]
+
+
+def transcribe_chunks_detailed(
+    chunks: Iterable,
+    model_name: str = DEFAULT_MODEL,
+    batch_size: int = None,
+    worker: ASRWorker = None,
+    chunk_duration: int = 360,
+    ram_budget_mb: float = None,
+    cache: TranscriptionCache = None,
+    on_chunk: Callable[[int, dict], None] = None,
+    timestamps: bool = False
+) -> list[dict]:
     """
     Transcreve múltiplos chunks usando batch processing para máximo uso de GPU.
 
+    O modelo é carregado uma única vez por processo (ver asr_worker.py) e
+    os chunks são agrupados em batches dimensionados pela memória livre.
+    Aceita um gerador (ex.: iter_audio_chunks), consumindo cada batch assim
+    que os seus chunks ficam prontos.
+
     Args:
-        chunk_paths: Lista de caminhos dos chunks
+        chunks: Caminhos dos chunks, arrays PCM ou AudioChunk (lista ou gerador)
         model_name: Nome do modelo Parakeet
-        batch_size: Tamanho do batch (auto-detectado se None)
+        batch_size: Tamanho máximo do batch (auto-detectado se None)
+        worker: Worker a usar (padrão: worker compartilhado do processo)
+        chunk_duration: Duração de cada chunk em segundos
+        ram_budget_mb: Orçamento de RAM para batches em CPU (MB)
+        cache: Cache de transcrições; chunks já transcritos não vão ao modelo
+        on_chunk: Callback (índice, resultado) chamado quando cada chunk termina
+        timestamps: Se True, pede timestamps de palavras ao modelo
 
     Returns:
-        Lista de transcrições na mesma ordem dos chunks
+        Resultados na mesma ordem dos chunks: dicionários com "text", "words"
+        (se timestamps) e, para AudioChunk, "offset", "start" e "end"
     """
-    import nemo.collections.asr as nemo_asr
-    import gc
+    if worker is None:
+        worker = get_asr_worker(model_name)
 
     # Verificar GPU disponível
-    use_gpu = torch.cuda.is_available()
-    if use_gpu:
+    if worker.device == "cuda":
         gpu_name = torch.cuda.get_device_name(0)
         gpu_memory = torch.cuda.get_device_properties(0).total_memory / 1e9
         print(f"GPU detectada: {gpu_name} ({gpu_memory:.1f} GB)")
-        batch_size = 1  # Forçar batch=1 para estabilidade
-        print(f"Usando batch size: {batch_size} (um chunk por vez)")
     else:
         print("AVISO: GPU não detectada, usando CPU (será mais lento)")
-        batch_size = 1
 
-    transcriptions = []
-    total_chunks = len(chunk_paths)
-
-    # Processar um chunk por vez, recarregando modelo para evitar memory leak
-    for i, chunk_path in enumerate(chunk_paths):
-        print(f"Transcrevendo chunk {i + 1}/{total_chunks}...")
+    scheduler = BatchScheduler(
+        worker,
+        chunk_duration=chunk_duration,
+        max_batch_size=batch_size,
+        ram_budget_mb=ram_budget_mb
+    )
+    scheduler.batch_size = scheduler.initial_batch_size()
+    print(f"Usando batch size: {scheduler.batch_size}")
+
+    model_kwargs = {"timestamps": True} if timestamps else {}
+    results = []
+    chunks = iter(chunks)
+    while True:
+        batch = list(itertools.islice(chunks, scheduler.batch_size))
+        if not batch:
+            break
+
+        audio = [chunk.audio if isinstance(chunk, AudioChunk) else chunk for chunk in batch]
+        batch_results = [None] * len(batch)
+        keys = [None] * len(batch)
+        if cache is not None:
+            for j, chunk_audio in enumerate(audio):
+                keys[j] = cache.key(chunk_audio, model_name=worker.model_name, chunk_duration=chunk_duration)
+                entry = cache.get(keys[j])
+                if entry is not None and (not timestamps or "words" in entry):
+                    batch_results[j] = {key: entry[key] for key in ("text", "words") if key in entry}
+
+        pending = [j for j, result in enumerate(batch_results) if result is None]
+        if pending:
+            outputs = scheduler.transcribe([audio[j] for j in pending], **model_kwargs)
+            for j, output in zip(pending, outputs):
+                batch_results[j] = {"text": output.text}
+                if timestamps:
+                    batch_results[j]["words"] = _hypothesis_words(output)
+                if cache is not None:
+                    cache.put(keys[j], model_name=worker.model_name, chunk_duration=chunk_duration, **batch_results[j])
+
+        for j, chunk in enumerate(batch):
+            if isinstance(chunk, AudioChunk):
+                batch_results[j].update(offset=chunk.offset, start=chunk.start, end=chunk.end)
+            if on_chunk is not None:
+                on_chunk(len(results) + j, batch_results[j])
+
+        results.extend(batch_results)
+        cached = len(batch) - len(pending)
+        print(f"  Chunks {len(results) - len(batch) + 1}-{len(results)} transcritos"
+              + (f" ({cached} do cache)" if cached else ""))
+
+    return results
 
-        # Carregar modelo fresco para cada chunk
-        asr_model = nemo_asr.models.ASRModel.from_pretrained(model_name=model_name)
-        if use_gpu:
-            asr_model = asr_model.cuda()
 
-        # Transcrever
-        outputs = asr_model.transcribe([chunk_path])
-        transcriptions.append(outputs[0].text)
+def transcribe_chunks_batch(
+    chunk_paths: Iterable[str],
+    model_name: str = DEFAULT_MODEL,
+    batch_size: int = None,
+    worker: ASRWorker = None,
+    chunk_duration: int = 360,
+    ram_budget_mb: float = None,
+    cache: TranscriptionCache = None
+) -> list[str]:
+    """
+    Transcreve múltiplos chunks e retorna só os textos.
 
-        # Limpar completamente
-        del asr_model
-        gc.collect()
-        if use_gpu:
-            torch.cuda.empty_cache()
-            torch.cuda.synchronize()
+    Ver transcribe_chunks_detailed para os argumentos.
 
-    return transcriptions
+    Returns:
+        Lista de transcrições na mesma ordem dos chunks
+    """
+    results = transcribe_chunks_detailed(
+        chunk_paths,
+        model_name=model_name,
+        batch_size=batch_size,
+        worker=worker,
+        chunk_duration=chunk_duration,
+        ram_budget_mb=ram_budget_mb,
+        cache=cache
+    )
+    return [result["text"] for result in results]
 
 
 def transcribe_audio_chunked(
     audio_path: str,
     output_file: str = None,
     chunk_duration: int = 360,
-    model_name: str = "nvidia/parakeet-tdt-0.6b-v3",
+    model_name: str = DEFAULT_MODEL,
     batch_size: int = None,
-    keep_chunks: bool = False
+    keep_chunks: bool = False,
+    worker: ASRWorker = None,
+    in_memory: bool = False,
+    pcm_format: str = "f32le",
+    cache: TranscriptionCache = None,
+    resumable: bool = False,
+    vad: bool = False,
+    overlap: float = 0.5,
+    output_format: str = "txt",
+    input_stream=None,
+    metrics: PipelineMetrics = None,
+    ram_budget_mb: float = None
 ) -> str:
     """
-    Transcreve um arquivo de áudio dividindo em chunks.
+    Transcreve um arquivo de áudio ou vídeo dividindo em chunks.
 
     Args:
-        audio_path: Caminho para o arquivo MP3
-        output_file: Arquivo para salvar a transcrição
+        audio_path: Caminho de qualquer arquivo que o ffmpeg leia (mp3, mp4,
+            mkv, webm, m4a, ...) ou "-" para ler de stdin / input_stream
+        output_file: Arquivo para salvar a transcrição (obrigatório com "-")
         chunk_duration: Duração de cada chunk em segundos
         model_name: Nome do modelo
-        batch_size: Tamanho do batch para GPU
+        batch_size: Tamanho máximo do batch (auto-detectado se None)
         keep_chunks: Se True, mantém os chunks temporários
+        worker: Worker ASR a usar (padrão: worker compartilhado do processo)
+        in_memory: Se True, passa o PCM direto da memória para o modelo, sem
+            escrever chunks WAV em disco
+        pcm_format: Formato do PCM no modo em memória ('f32le' ou 's16le')
+        cache: Cache de transcrições por chunk (None = sem cache)
+        resumable: Se True, registra o progresso em <saída>.job.json e, se o
+            manifesto já existir, retoma do primeiro chunk incompleto. O
+            progresso é gravado ao fim de cada batch: se o processo morrer no
+            meio de um batch, só os chunks desse batch são transcritos de novo
+        vad: Se True, corta os chunks em pontos de silêncio (decodificação em
+            memória) com overlap entre chunks vizinhos
+        overlap: Sobreposição em segundos de cada lado do corte no modo VAD
+        output_format: Formato do arquivo de saída: txt, srt, vtt ou json
+        input_stream: Stream com a mídia quando audio_path é "-" (ex.: stdout
+            de um yt-dlp); padrão: stdin do processo
+        metrics: Métricas a preencher (tempo por estágio, RTF, bytes temporários)
+        ram_budget_mb: Orçamento de RAM para batches em CPU (MB; padrão: a
+            memória disponível)
 
     Returns:
         Transcrição completa
     """
+    streaming = is_stdin(audio_path)
     audio_path = Path(audio_path)
 
-    if not audio_path.exists():
+    if streaming:
+        if output_file is None:
+            raise ValueError("Informe o arquivo de saída ao ler de stdin")
+        if resumable:
+            raise ValueError("Jobs retomáveis não são suportados com stdin (não há como retomar o stream)")
+    elif not audio_path.exists():
         raise FileNotFoundError(f"Arquivo não encontrado: {audio_path}")
 
-    if audio_path.suffix.lower() != ".mp3":
-        raise ValueError(f"Esperado arquivo MP3, recebido: {audio_path.suffix}")
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Formato de saída inválido: {output_format} (use {', '.join(OUTPUT_FORMATS)})")
+
+    if output_file is None:
+        output_file = audio_path.with_suffix(f".{output_format}")
+    output_path = Path(output_file)
+    source = STDIN_PATH if streaming else str(audio_path)
 
-    # Criar diretório temporário para chunks
-    temp_dir = tempfile.mkdtemp(prefix="transcribe_chunks_")
+    # Timestamps de palavras são necessários para legendas e para costurar overlaps
+    overlap = overlap if vad else 0
+    timestamps = output_format != "txt" or overlap > 0
+
+    if worker is None:
+        worker = get_asr_worker(model_name)
+    previous_metrics = worker.metrics
+    if metrics is not None:
+        worker.metrics = metrics
+
+    # Criar diretório temporário para chunks (não usado em memória / VAD)
+    temp_dir = None if in_memory or vad else tempfile.mkdtemp(prefix="transcribe_chunks_")
 
     try:
-        # 1. Dividir áudio em chunks
+        # 1. Dividir áudio em chunks (decodificação única, em streaming)
         print("\n=== Etapa 1: Dividindo áudio em chunks ===")
-        chunk_paths = split_audio_into_chunks(
-            str(audio_path),
-            chunk_duration=chunk_duration,
-            output_dir=temp_dir
-        )
-
-        # 2. Transcrever chunks com batch processing
+        total_duration = None
+        if not streaming:
+            try:
+                with measure(metrics, "ffprobe"):
+                    total_duration = get_audio_duration(source)
+            except ValueError:
+                # Containers sem duração no cabeçalho (ex.: webm de live)
+                pass
+        if total_duration is not None:
+            print(f"Duração total do áudio: {total_duration:.1f}s ({total_duration/60:.1f} min)")
+        else:
+            print("Duração total do áudio: desconhecida (lendo em streaming)")
+
+        job = None
+        start_time = 0
+        results = []
+        if resumable:
+            options = {"vad": True, "overlap": overlap} if vad else {}
+            if timestamps:
+                # Chunks de um job em txt não têm palavras para legendas
+                options["timestamps"] = True
+            job = TranscriptionJob.open(
+                output_path.with_suffix(".job.json"),
+                audio_path,
+                model_name=worker.model_name if worker else model_name,
+                chunk_duration=chunk_duration,
+                # Com VAD os limites só são conhecidos durante o corte
+                total_duration=None if vad else total_duration,
+                options=options
+            )
+            results = job.done_chunks()
+            start_time = job.resume_offset
+            if results:
+                print(f"Retomando job: {len(results)} chunks já concluídos, continuando em {start_time}s")
+
+        if job is not None and job.is_done:
+            chunks = []
+        elif vad:
+            print(f"Modo VAD: cortes em silêncio a cada ~{chunk_duration}s, overlap de {overlap}s")
+            chunks = iter_vad_chunks(
+                source,
+                chunk_duration=chunk_duration,
+                overlap=overlap,
+                start_time=start_time,
+                input_stream=input_stream
+            )
+        elif in_memory:
+            # Um buffer por chunk do maior batch possível; o batch só diminui
+            if batch_size is None:
+                batch_size = BatchScheduler(
+                    worker,
+                    chunk_duration=chunk_duration,
+                    ram_budget_mb=ram_budget_mb
+                ).initial_batch_size()
+            print(f"Modo em memória: PCM {pcm_format}, até {batch_size} chunks em buffers reutilizados")
+            chunks = _with_offsets(iter_pcm_chunks(
+                source,
+                chunk_duration=chunk_duration,
+                num_buffers=batch_size,
+                pcm_format=pcm_format,
+                start_time=start_time,
+                input_stream=input_stream
+            ), chunk_duration, start_time)
+        else:
+            chunks = _with_offsets(iter_audio_chunks(
+                source,
+                chunk_duration=chunk_duration,
+                output_dir=temp_dir,
+                start_time=start_time,
+                input_stream=input_stream
+            ), chunk_duration, start_time)
+
+        if metrics is not None:
+            chunks = _measured_chunks(chunks, metrics)
+
+        # 2. Transcrever chunks com batch processing, à medida que ficam prontos
         print("\n=== Etapa 2: Transcrevendo chunks (GPU batch) ===")
-        transcriptions = transcribe_chunks_batch(
-            chunk_paths,
-            model_name=model_name,
-            batch_size=batch_size
-        )
+        if job is not None and job.is_done:
+            print("Job já concluído, usando transcrições do manifesto.")
+        else:
+            first_index = len(results)
+
+            def checkpoint(i, result):
+                details = {key: value for key, value in result.items() if key != "text"}
+                job.complete_chunk(first_index + i, result["text"], **details)
+
+            results += transcribe_chunks_detailed(
+                chunks,
+                model_name=model_name,
+                batch_size=batch_size,
+                worker=worker,
+                chunk_duration=chunk_duration,
+                ram_budget_mb=ram_budget_mb,
+                cache=cache,
+                on_chunk=checkpoint if job else None,
+                timestamps=timestamps
+            )
+            if job is not None:
+                job.finish()
+
+        if streaming and not results:
+            # O ffmpeg não falha com MP4 não fragmentado em pipe, só não gera áudio
+            raise ValueError("Nenhum áudio decodificado do stream (MP4 em stdin precisa de faststart ou fragmentado)")
 
         # 3. Juntar transcrições
         print("\n=== Etapa 3: Juntando transcrições ===")
-        full_transcription = " ".join(transcriptions)
+        full_transcription = to_text(results)
 
         # 4. Salvar resultado
-        if output_file is None:
-            output_file = audio_path.with_suffix(".txt")
-
-        output_path = Path(output_file)
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(full_transcription)
+        with measure(metrics, "output"):
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(render_transcript(results, output_format))
 
         print(f"\nTranscrição salva em: {output_path}")
         print(f"Total de caracteres: {len(full_transcription)}")
@@ -209,33 +766,69 @@ def transcribe_audio_chunked(
         return full_transcription
 
     finally:
+        worker.metrics = previous_metrics
+
         # Limpar arquivos temporários
-        if not keep_chunks and os.path.exists(temp_dir):
-            shutil.rmtree(temp_dir)
+        if temp_dir and not keep_chunks and os.path.exists(temp_dir):
+            with measure(metrics, "temp_cleanup"):
+                shutil.rmtree(temp_dir)
             print("Chunks temporários removidos.")
 
+        if metrics is not None:
+            metrics.finish()
+
 
 def main():
     if len(sys.argv) < 2:
-        print("Uso: python transcribe_chunks.py <arquivo.mp3> [opções]")
+        print("Uso: python transcribe_chunks.py <arquivo|-> [opções]")
+        print()
+        print("Entrada: qualquer arquivo de áudio ou vídeo (mp3, mp4, mkv, webm, m4a, ...)")
+        print("ou - para ler de stdin (exige -o; não suporta -j)")
         print()
         print("Opções:")
         print("  -o, --output <arquivo>    Salvar transcrição em arquivo")
         print("  -c, --chunk <segundos>    Duração do chunk (padrão: 360 = 6 min)")
-        print("  -b, --batch <tamanho>     Tamanho do batch GPU (auto-detectado)")
+        print("  -b, --batch <tamanho>     Tamanho máximo do batch (auto-detectado)")
+        print("  --ram-budget <MB>         RAM para batches em CPU (padrão: memória disponível)")
         print("  -k, --keep-chunks         Manter chunks temporários")
         print("  -m, --model <nome>        Modelo (padrão: nvidia/parakeet-tdt-0.6b-v3)")
+        print("  --in-memory               PCM direto para o modelo, sem chunks em disco")
+        print("  --pcm-format <formato>    PCM do modo em memória: f32le ou s16le (padrão: f32le)")
+        print("  --cache-dir <diretório>   Diretório do cache de transcrições por chunk")
+        print("  --no-cache                Não usar o cache de transcrições")
+        print("  -j, --job                 Registrar progresso em <saída>.job.json e retomar")
+        print("  --vad                     Cortar chunks em pontos de silêncio, com overlap")
+        print("  --overlap <segundos>      Overlap de cada lado do corte no modo VAD (padrão: 0.5)")
+        print("  -f, --format <formato>    Saída: txt, srt, vtt ou json (padrão: txt)")
+        print("  -w, --workers <n>         Transcrever em CPU com n processos (um modelo cada)")
+        print("  -t, --threads <n>         Threads do PyTorch por processo (padrão: núcleos / n)")
+        print("  --metrics <arquivo>       Acrescentar métricas da execução em JSON lines")
+        print("  --prometheus <arquivo>    Gravar métricas da execução no formato do Prometheus")
         print()
         print("Exemplo:")
-        print("  python transcribe_chunks.py video.mp3 -o transcricao.txt")
+        print("  python transcribe_chunks.py video.mp4 -o transcricao.txt")
+        print("  yt-dlp -f bestaudio -o - URL | python transcribe_chunks.py - -o transcricao.txt")
         sys.exit(1)
 
     audio_path = sys.argv[1]
     output_file = None
     chunk_duration = 360  # 6 minutos
     batch_size = None
+    ram_budget_mb = None
     keep_chunks = False
-    model_name = "nvidia/parakeet-tdt-0.6b-v3"
+    model_name = DEFAULT_MODEL
+    in_memory = False
+    pcm_format = "f32le"
+    cache_dir = DEFAULT_CACHE_DIR
+    use_cache = True
+    resumable = False
+    vad = False
+    overlap = 0.5
+    output_format = "txt"
+    cpu_workers = None
+    threads_per_worker = None
+    metrics_file = None
+    prometheus_file = None
 
     # Parse argumentos
     args = sys.argv[2:]
@@ -250,24 +843,107 @@ def main():
         elif args[i] in ("-b", "--batch"):
             batch_size = int(args[i + 1])
             i += 2
+        elif args[i] == "--ram-budget":
+            ram_budget_mb = float(args[i + 1])
+            i += 2
         elif args[i] in ("-k", "--keep-chunks"):
             keep_chunks = True
             i += 1
         elif args[i] in ("-m", "--model"):
             model_name = args[i + 1]
             i += 2
+        elif args[i] == "--in-memory":
+            in_memory = True
+            i += 1
+        elif args[i] == "--pcm-format":
+            pcm_format = args[i + 1]
+            i += 2
+        elif args[i] == "--cache-dir":
+            cache_dir = args[i + 1]
+            i += 2
+        elif args[i] == "--no-cache":
+            use_cache = False
+            i += 1
+        elif args[i] in ("-j", "--job"):
+            resumable = True
+            i += 1
+        elif args[i] == "--vad":
+            vad = True
+            i += 1
+        elif args[i] == "--overlap":
+            overlap = float(args[i + 1])
+            i += 2
+        elif args[i] in ("-f", "--format"):
+            output_format = args[i + 1]
+            i += 2
+        elif args[i] in ("-w", "--workers"):
+            cpu_workers = int(args[i + 1])
+            i += 2
+        elif args[i] in ("-t", "--threads"):
+            threads_per_worker = int(args[i + 1])
+            i += 2
+        elif args[i] == "--metrics":
+            metrics_file = args[i + 1]
+            i += 2
+        elif args[i] == "--prometheus":
+            prometheus_file = args[i + 1]
+            i += 2
         else:
             i += 1
 
+    worker = None
+    if cpu_workers:
+        worker = ASRProcessPool(model_name, workers=cpu_workers, threads_per_worker=threads_per_worker)
+        print(f"Modo CPU paralelo: {worker.workers} processos x {worker.threads_per_worker} threads")
+        # Um chunk por processo em cada batch
+        batch_size = batch_size or worker.workers
+
+    metrics = None
+    if metrics_file or prometheus_file:
+        if vad:
+            mode = "vad"
+        elif in_memory:
+            mode = "in_memory"
+        else:
+            mode = "files"
+        metrics = PipelineMetrics(labels={
+            "input": Path(audio_path).name,
+            "model": model_name,
+            "mode": mode,
+            "chunk_duration": chunk_duration,
+            "cpu_workers": cpu_workers or 0,
+        })
+
     transcription = transcribe_audio_chunked(
         audio_path,
         output_file=output_file,
         chunk_duration=chunk_duration,
         model_name=model_name,
         batch_size=batch_size,
-        keep_chunks=keep_chunks
+        keep_chunks=keep_chunks,
+        worker=worker,
+        in_memory=in_memory,
+        pcm_format=pcm_format,
+        cache=TranscriptionCache(cache_dir) if use_cache else None,
+        resumable=resumable,
+        vad=vad,
+        overlap=overlap,
+        output_format=output_format,
+        metrics=metrics,
+        ram_budget_mb=ram_budget_mb
     )
 
+    if cpu_workers:
+        # O RSS dos processos só entra em peak_children_rss_mb depois que terminam
+        worker.stop()
+
+    if metrics_file:
+        metrics.write_jsonl(metrics_file)
+        print(f"Métricas acrescentadas em: {metrics_file}")
+    if prometheus_file:
+        metrics.write_prometheus(prometheus_file)
+        print(f"Métricas Prometheus salvas em: {prometheus_file}")
+
     print("\n=== Transcrição Completa ===")
     # Mostrar apenas preview se muito longo
     if len(transcription) > 500:
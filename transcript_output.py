@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Junção das transcrições dos chunks e formatos de saída (TXT, SRT, VTT, JSON).
+
+Cada resultado de chunk é um dicionário com:
+    text:   texto do chunk
+    words:  palavras com tempos locais ao chunk ({"word", "start", "end"}), opcional
+    offset: tempo global (s) da primeira amostra do áudio do chunk
+    start:  início (s, global) da região própria do chunk
+    end:    fim (s, global) da região própria do chunk
+
+Com overlap entre chunks, cada palavra pertence ao chunk cuja região própria
+contém o ponto médio da palavra, o que remove as duplicatas da sobreposição.
+"""
+
+import json
+
+OUTPUT_FORMATS = ("txt", "srt", "vtt", "json")
+
+# Quebra de segmentos: pausa longa, duração máxima ou fim de frase
+SEGMENT_MAX_GAP = 0.8
+SEGMENT_MAX_DURATION = 8.0
+SENTENCE_END = (".", "?", "!", "…")
+
+
+def _chunk_words(results: list[dict]) -> list[list[dict]]:
+    """Palavras de cada chunk em tempo global, só as da região própria."""
+    last_index = len(results) - 1
+    chunk_words = []
+
+    for i, result in enumerate(results):
+        offset = result.get("offset", 0.0)
+        start = result.get("start")
+        end = result.get("end")
+        words = []
+
+        for word in result.get("words") or []:
+            word_start = offset + word["start"]
+            word_end = offset + word["end"]
+            middle = (word_start + word_end) / 2
+            if start is not None and i > 0 and middle < start:
+                continue
+            if end is not None and i < last_index and middle >= end:
+                continue
+            words.append({"word": word["word"], "start": round(word_start, 3), "end": round(word_end, 3)})
+
+        chunk_words.append(words)
+
+    return chunk_words
+
+
+def stitch_words(results: list[dict]) -> list[dict]:
+    """
+    Converte as palavras de todos os chunks para tempo global, sem duplicatas.
+
+    Args:
+        results: Resultados dos chunks, em ordem
+
+    Returns:
+        Lista de palavras {"word", "start", "end"} em tempo global
+    """
+    return [word for words in _chunk_words(results) for word in words]
+
+
+def build_segments(results: list[dict]) -> list[dict]:
+    """
+    Agrupa as palavras em segmentos de legenda com tempo global.
+
+    Um segmento termina em fim de frase, em pausa maior que SEGMENT_MAX_GAP
+    ou ao passar de SEGMENT_MAX_DURATION. Chunks sem timestamps de palavras
+    viram um único segmento cobrindo a região própria do chunk.
+
+    Returns:
+        Lista de segmentos {"start", "end", "text"}
+    """
+    segments = []
+    current = []
+
+    def flush():
+        if current:
+            segments.append({
+                "start": current[0]["start"],
+                "end": current[-1]["end"],
+                "text": " ".join(word["word"] for word in current),
+            })
+            current.clear()
+
+    for result, words in zip(results, _chunk_words(results)):
+        if not words:
+            flush()
+            if result.get("text"):
+                start = result.get("start") or result.get("offset", 0.0)
+                segments.append({"start": start, "end": result.get("end", start), "text": result["text"]})
+            continue
+
+        for word in words:
+            if current and (
+                word["start"] - current[-1]["end"] > SEGMENT_MAX_GAP
+                or word["end"] - current[0]["start"] > SEGMENT_MAX_DURATION
+            ):
+                flush()
+            current.append(word)
+            if word["word"].endswith(SENTENCE_END):
+                flush()
+
+    flush()
+    return segments
+
+
+def format_timestamp(seconds: float, decimal_separator: str = ",") -> str:
+    """Formata segundos como HH:MM:SS,mmm (SRT) ou HH:MM:SS.mmm (VTT)."""
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{decimal_separator}{millis:03d}"
+
+
+def to_text(results: list[dict]) -> str:
+    """Texto corrido: palavras costuradas quando há timestamps, senão os textos dos chunks."""
+    parts = []
+    for result, words in zip(results, _chunk_words(results)):
+        if words:
+            parts.extend(word["word"] for word in words)
+        elif result.get("text"):
+            parts.append(result["text"])
+    return " ".join(parts)
+
+
+def to_srt(results: list[dict]) -> str:
+    lines = []
+    for i, segment in enumerate(build_segments(results), start=1):
+        lines.append(str(i))
+        lines.append(f"{format_timestamp(segment['start'])} --> {format_timestamp(segment['end'])}")
+        lines.append(segment["text"])
+        lines.append("")
+    return "\n".join(lines)
+
+
+def to_vtt(results: list[dict]) -> str:
+    lines = ["WEBVTT", ""]
+    for segment in build_segments(results):
+        lines.append(f"{format_timestamp(segment['start'], '.')} --> {format_timestamp(segment['end'], '.')}")
+        lines.append(segment["text"])
+        lines.append("")
+    return "\n".join(lines)
+
+
+def to_json(results: list[dict]) -> str:
+    return json.dumps({
+        "text": to_text(results),
+        "segments": build_segments(results),
+        "words": stitch_words(results),
+    }, ensure_ascii=False, indent=2)
+
+
+def render_transcript(results: list[dict], output_format: str = "txt") -> str:
+    """
+    Gera o conteúdo do arquivo de saída no formato pedido.
+
+    Args:
+        results: Resultados dos chunks, em ordem
+        output_format: 'txt', 'srt', 'vtt' ou 'json'
+    """
+    renderers = {"txt": to_text, "srt": to_srt, "vtt": to_vtt, "json": to_json}
+    if output_format not in renderers:
+        raise ValueError(f"Formato de saída inválido: {output_format} (use {', '.join(OUTPUT_FORMATS)})")
+    return renderers[output_format](results)
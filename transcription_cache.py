@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Cache em disco de transcrições por chunk, endereçado pelo conteúdo do áudio.
+
+A chave de cada entrada é o hash do PCM decodificado do chunk combinado com o
+nome do modelo e a duração do chunk. Re-executar a transcrição do mesmo áudio
+(ou de um clip que compartilha chunks com a live original) reaproveita os
+chunks já transcritos. O tamanho total é limitado com remoção LRU.
+
+Uso: python transcription_cache.py <comando> [opções]
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "agent-youtube" / "transcriptions"
+DEFAULT_MAX_SIZE_MB = 512
+# (taxa, canais, bytes por amostra) dos chunks: WAV s16le de 16 kHz mono
+PCM_HASH_FORMAT = (16000, 1, 2)
+
+
+def hash_chunk_pcm(chunk) -> str:
+    """
+    Retorna o SHA-256 do PCM de um chunk.
+
+    O hash é sempre das amostras em int16, como no WAV s16le de 16 kHz mono
+    que o ffmpeg grava: o mesmo trecho tem a mesma chave em arquivos, em
+    memória f32le ou em memória s16le.
+
+    Args:
+        chunk: Caminho de um WAV (hash dos frames, sem o cabeçalho) ou array
+            NumPy com as amostras (float em [-1, 1) ou int16)
+
+    Returns:
+        Hash hexadecimal
+    """
+    digest = hashlib.sha256()
+    if isinstance(chunk, (str, Path)):
+        with wave.open(str(chunk), "rb") as wav:
+            wav_format = (wav.getframerate(), wav.getnchannels(), wav.getsampwidth())
+            # Só um WAV fora do formato dos chunks leva o formato na chave
+            if wav_format != PCM_HASH_FORMAT:
+                digest.update(":".join(map(str, wav_format)).encode())
+            while True:
+                frames = wav.readframes(1 << 16)
+                if not frames:
+                    break
+                digest.update(frames)
+    else:
+        samples = np.asarray(chunk)
+        if samples.dtype != np.int16:
+            # Mesmo arredondamento da conversão float -> s16 do ffmpeg
+            samples = np.clip(np.rint(samples * 32768.0), -32768, 32767)
+        digest.update(samples.astype("<i2", copy=False).tobytes())
+    return digest.hexdigest()
+
+
+class TranscriptionCache:
+    """Cache de transcrições em arquivos JSON, um por chunk, com remoção LRU."""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_size_mb: float = DEFAULT_MAX_SIZE_MB):
+        """
+        Args:
+            cache_dir: Diretório do cache
+            max_size_mb: Tamanho máximo do cache em MB (None = sem limite)
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_size_mb = max_size_mb
+        self.hits = 0
+        self.misses = 0
+        # Tamanho total conhecido, para não varrer o diretório a cada put()
+        self._size_bytes = None
+
+    def key(self, chunk, model_name: str, chunk_duration: float) -> str:
+        """Chave do chunk: hash do PCM + modelo + duração do chunk."""
+        pcm_hash = hash_chunk_pcm(chunk)
+        return hashlib.sha256(f"{pcm_hash}|{model_name}|{chunk_duration}".encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> dict:
+        """
+        Retorna a entrada do cache ou None.
+
+        Um acerto atualiza o mtime do arquivo, que serve de marcador LRU.
+        """
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, text: str, **metadata):
+        """Grava a transcrição do chunk (escrita atômica) e aplica o limite."""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {"text": text, "created_at": time.time(), **metadata}
+
+        if self.max_size_mb is not None and self._size_bytes is None:
+            self._size_bytes = self.size_bytes()
+
+        # Sobrescrever uma entrada troca o tamanho dela, não soma
+        try:
+            previous_size = path.stat().st_size
+        except OSError:
+            previous_size = 0
+
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+        if self.max_size_mb is not None:
+            self._size_bytes += path.stat().st_size - previous_size
+            if self._size_bytes > self.max_size_mb * 1e6:
+                self.prune(self.max_size_mb)
+
+    def entries(self) -> list[tuple[Path, int, float]]:
+        """Lista (caminho, bytes, último acesso) de todas as entradas, mais antigas primeiro."""
+        entries = []
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        entries.sort(key=lambda entry: entry[2])
+        return entries
+
+    def size_bytes(self) -> int:
+        """Tamanho total do cache em bytes."""
+        return sum(size for _, size, _ in self.entries())
+
+    def prune(self, max_size_mb: float) -> int:
+        """
+        Remove as entradas menos usadas até o cache caber em max_size_mb.
+
+        Returns:
+            Número de entradas removidas
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        limit = max_size_mb * 1e6
+        removed = 0
+
+        for path, size, _ in entries:
+            if total <= limit:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+
+        self._size_bytes = total
+        return removed
+
+    def clear(self) -> int:
+        """Remove todas as entradas. Retorna o número de entradas removidas."""
+        return self.prune(0)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Uso: python transcription_cache.py <comando> [opções]")
+        print()
+        print("Comandos:")
+        print("  stats                     Mostrar tamanho e número de entradas")
+        print("  list                      Listar entradas (mais antigas primeiro)")
+        print("  prune                     Remover entradas até caber no limite")
+        print("  clear                     Remover todas as entradas")
+        print()
+        print("Opções:")
+        print(f"  -d, --dir <diretório>     Diretório do cache (padrão: {DEFAULT_CACHE_DIR})")
+        print(f"  -s, --max-size <MB>       Limite para prune (padrão: {DEFAULT_MAX_SIZE_MB})")
+        print()
+        print("Exemplo:")
+        print("  python transcription_cache.py prune -s 100")
+        sys.exit(1)
+
+    command = sys.argv[1]
+    cache_dir = DEFAULT_CACHE_DIR
+    max_size_mb = DEFAULT_MAX_SIZE_MB
+
+    # Parse argumentos
+    args = sys.argv[2:]
+    i = 0
+    while i < len(args):
+        if args[i] in ("-d", "--dir"):
+            cache_dir = args[i + 1]
+            i += 2
+        elif args[i] in ("-s", "--max-size"):
+            max_size_mb = float(args[i + 1])
+            i += 2
+        else:
+            i += 1
+
+    cache = TranscriptionCache(cache_dir, max_size_mb=None)
+
+    if command == "stats":
+        entries = cache.entries()
+        total = sum(size for _, size, _ in entries)
+        print(f"Diretório: {cache.cache_dir}")
+        print(f"Entradas: {len(entries)}")
+        print(f"Tamanho: {total / 1e6:.2f} MB")
+    elif command == "list":
+        for path, size, mtime in cache.entries():
+            last_used = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(mtime))
+            print(f"{path.stem}  {size:>8} B  {last_used}")
+    elif command == "prune":
+        removed = cache.prune(max_size_mb)
+        print(f"{removed} entradas removidas (limite: {max_size_mb} MB)")
+    elif command == "clear":
+        removed = cache.clear()
+        print(f"{removed} entradas removidas")
+    else:
+        print(f"Comando desconhecido: {command}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Manifesto de job para transcrições longas retomáveis.
+
+O manifesto (JSON) registra os limites de cada chunk, o status e o texto de
+cada chunk à medida que ele termina, sempre com escrita atômica. Se o processo
+morrer no meio, re-executar a transcrição do mesmo arquivo retoma a partir do
+primeiro chunk incompleto.
+
+O modelo devolve os resultados por batch, então os chunks são registrados
+quando o batch inteiro termina. Uma interrupção refaz no máximo os chunks do
+batch em andamento; chunks de batches concluídos nunca são transcritos de novo.
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+
+MANIFEST_VERSION = 1
+
+
+def _input_fingerprint(audio_path: Path) -> dict:
+    stat = audio_path.stat()
+    return {
+        "path": str(audio_path.resolve()),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+
+
+class TranscriptionJob:
+    """Estado persistente de uma transcrição em chunks."""
+
+    def __init__(self, manifest_path: str, manifest: dict):
+        self.manifest_path = Path(manifest_path)
+        self.manifest = manifest
+
+    @classmethod
+    def open(
+        cls,
+        manifest_path: str,
+        audio_path: str,
+        model_name: str,
+        chunk_duration: int,
+        total_duration: float = None,
+        options: dict = None
+    ) -> "TranscriptionJob":
+        """
+        Abre o manifesto existente ou cria um novo.
+
+        Um manifesto só é reaproveitado se o arquivo de entrada (caminho,
+        tamanho e mtime), o modelo, a duração dos chunks e as opções
+        forem os mesmos.
+
+        Args:
+            manifest_path: Caminho do manifesto JSON
+            audio_path: Arquivo de áudio sendo transcrito
+            model_name: Nome do modelo
+            chunk_duration: Duração de cada chunk em segundos
+            total_duration: Duração total do áudio, para planejar os chunks
+                (None quando os limites só são conhecidos durante o corte)
+            options: Opções que mudam os chunks ou o que é guardado de cada
+                um (ex.: VAD, overlap, timestamps de palavras)
+        """
+        manifest_path = Path(manifest_path)
+        fingerprint = _input_fingerprint(Path(audio_path))
+
+        if manifest_path.exists():
+            try:
+                with open(manifest_path, encoding="utf-8") as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError):
+                manifest = None
+
+            if (
+                manifest is not None
+                and manifest.get("version") == MANIFEST_VERSION
+                and manifest.get("input") == fingerprint
+                and manifest.get("model_name") == model_name
+                and manifest.get("chunk_duration") == chunk_duration
+                and manifest.get("options", {}) == (options or {})
+            ):
+                return cls(manifest_path, manifest)
+
+            print(f"Manifesto {manifest_path} não corresponde à entrada atual, iniciando do zero.")
+
+        chunks = []
+        if total_duration is not None:
+            num_chunks = int(total_duration // chunk_duration) + (1 if total_duration % chunk_duration > 0 else 0)
+            for i in range(num_chunks):
+                chunks.append({
+                    "index": i,
+                    "start": i * chunk_duration,
+                    "end": min((i + 1) * chunk_duration, total_duration),
+                    "status": "pending",
+                    "text": None,
+                })
+
+        job = cls(manifest_path, {
+            "version": MANIFEST_VERSION,
+            "input": fingerprint,
+            "model_name": model_name,
+            "chunk_duration": chunk_duration,
+            "total_duration": total_duration,
+            "options": options or {},
+            "status": "running",
+            "chunks": chunks,
+        })
+        job.save()
+        return job
+
+    @property
+    def chunks(self) -> list[dict]:
+        return self.manifest["chunks"]
+
+    @property
+    def next_index(self) -> int:
+        """Índice do primeiro chunk incompleto."""
+        for chunk in self.chunks:
+            if chunk["status"] != "done":
+                return chunk["index"]
+        return len(self.chunks)
+
+    @property
+    def resume_offset(self) -> float:
+        """Posição (s) no áudio onde a transcrição deve continuar."""
+        index = self.next_index
+        if index < len(self.chunks):
+            return self.chunks[index]["start"]
+        if self.chunks:
+            return self.chunks[-1]["end"]
+        return 0
+
+    @property
+    def is_done(self) -> bool:
+        return self.manifest["status"] == "done"
+
+    def done_texts(self) -> list[str]:
+        """Textos dos chunks concluídos em sequência desde o início."""
+        return [chunk["text"] for chunk in self.done_chunks()]
+
+    def done_chunks(self) -> list[dict]:
+        """Chunks concluídos em sequência desde o início."""
+        return self.chunks[:self.next_index]
+
+    def complete_chunk(self, index: int, text: str, **details):
+        """
+        Marca o chunk como concluído e persiste o manifesto.
+
+        Args:
+            index: Índice do chunk
+            text: Transcrição do chunk
+            **details: Dados extras do chunk (ex.: words, offset, start, end)
+        """
+        chunk_duration = self.manifest["chunk_duration"]
+        while len(self.chunks) <= index:
+            i = len(self.chunks)
+            self.chunks.append({
+                "index": i,
+                "start": i * chunk_duration,
+                "end": (i + 1) * chunk_duration,
+                "status": "pending",
+                "text": None,
+            })
+
+        self.chunks[index].update(details)
+        self.chunks[index]["status"] = "done"
+        self.chunks[index]["text"] = text
+        self.save()
+
+    def finish(self):
+        """Marca o job como concluído, descartando chunks planejados que não vieram."""
+        self.manifest["chunks"] = [chunk for chunk in self.chunks if chunk["status"] == "done"]
+        self.manifest["status"] = "done"
+        self.save()
+
+    def save(self):
+        """Grava o manifesto de forma atômica (arquivo temporário + rename)."""
+        self.manifest["updated_at"] = time.time()
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+
+        tmp_path = self.manifest_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
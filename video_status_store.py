@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Armazenamento do status dos vídeos em SQLite (modo WAL).
+
+Substitui a leitura e reescrita completa do videos_status.json a cada mudança
+de status. Cada atualização é uma transação sobre um único vídeo, então
+workers concorrentes do pipeline não perdem as atualizações uns dos outros.
+Há índices em status e scheduled_at, e as consultas de "próximos vídeos"
+usam índice em vez de carregar todos os registros.
+
+O formato do videos_status.json (incluindo last_updated e status_legend) pode
+ser importado e exportado sem perdas.
+
+Uso: python video_status_store.py <comando> [opções]
+"""
+
+import json
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+
+DEFAULT_DB_PATH = Path(__file__).parent / "videos_status.db"
+DEFAULT_JSON_PATH = Path(__file__).parent / "videos_status.json"
+
+# Campos do videos_status.json, na ordem do arquivo
+VIDEO_FIELDS = (
+    "id", "file_path", "title", "status",
+    "has_thumbnail", "has_transcription", "has_description",
+    "published_at", "scheduled_at", "youtube_url", "notes",
+)
+BOOLEAN_FIELDS = ("has_thumbnail", "has_transcription", "has_description")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    id TEXT PRIMARY KEY,
+    file_path TEXT,
+    title TEXT,
+    status TEXT NOT NULL,
+    has_thumbnail INTEGER NOT NULL DEFAULT 0,
+    has_transcription INTEGER NOT NULL DEFAULT 0,
+    has_description INTEGER NOT NULL DEFAULT 0,
+    published_at TEXT,
+    scheduled_at TEXT,
+    youtube_url TEXT,
+    notes TEXT NOT NULL DEFAULT '',
+    position INTEGER NOT NULL,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_videos_status ON videos (status);
+CREATE INDEX IF NOT EXISTS idx_videos_scheduled_at ON videos (scheduled_at);
+CREATE INDEX IF NOT EXISTS idx_videos_pending_transcription
+    ON videos (status, has_transcription, position);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def _row_to_video(row: sqlite3.Row) -> dict:
+    video = {field: row[field] for field in VIDEO_FIELDS}
+    for field in BOOLEAN_FIELDS:
+        video[field] = bool(video[field])
+    if row["extra"]:
+        video.update(json.loads(row["extra"]))
+    return video
+
+
+def _video_to_params(video: dict) -> dict:
+    params = {field: video.get(field) for field in VIDEO_FIELDS}
+    for field in BOOLEAN_FIELDS:
+        params[field] = int(bool(params[field]))
+    if params["notes"] is None:
+        params["notes"] = ""
+    extra = {key: value for key, value in video.items() if key not in VIDEO_FIELDS}
+    params["extra"] = json.dumps(extra, ensure_ascii=False) if extra else None
+    return params
+
+
+class VideoStatusStore:
+    """Status dos vídeos em SQLite, seguro para vários threads e processos."""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        """
+        Args:
+            db_path: Caminho do banco SQLite (criado se não existir)
+        """
+        self.db_path = Path(db_path)
+        self._local = threading.local()
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Uma conexão por thread; sqlite3 não compartilha conexões entre threads."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """Transação com lock de escrita desde o início (BEGIN IMMEDIATE)."""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _touch(self, conn: sqlite3.Connection):
+        conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('last_updated', ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (json.dumps(date.today().isoformat()),)
+        )
+
+    def get(self, video_id: str) -> dict | None:
+        """Retorna o vídeo com o id dado, ou None."""
+        row = self._connection().execute("SELECT * FROM videos WHERE id = ?", (video_id,)).fetchone()
+        return _row_to_video(row) if row else None
+
+    def list_videos(self, status: str = None) -> list[dict]:
+        """Lista os vídeos na ordem original, opcionalmente filtrando por status."""
+        if status is None:
+            rows = self._connection().execute("SELECT * FROM videos ORDER BY position")
+        else:
+            rows = self._connection().execute(
+                "SELECT * FROM videos WHERE status = ? ORDER BY position", (status,)
+            )
+        return [_row_to_video(row) for row in rows]
+
+    def next_missing_transcription(self, limit: int = 1, statuses: tuple = ("ready",)) -> list[dict]:
+        """
+        Próximos vídeos com um dos status dados e sem transcrição.
+
+        Usa o índice (status, has_transcription, position): custo O(log n)
+        mais os registros retornados, sem varrer a tabela.
+
+        Args:
+            limit: Máximo de vídeos (None = todos)
+            statuses: Status aceitos
+        """
+        placeholders = ", ".join("?" for _ in statuses)
+        rows = self._connection().execute(
+            f"SELECT * FROM videos WHERE status IN ({placeholders}) AND has_transcription = 0 "
+            "ORDER BY position LIMIT ?",
+            (*statuses, -1 if limit is None else limit)
+        )
+        return [_row_to_video(row) for row in rows]
+
+    def upsert(self, video: dict):
+        """Insere ou substitui um vídeo (novos vídeos vão para o fim da lista)."""
+        params = _video_to_params(video)
+        with self._transaction() as conn:
+            row = conn.execute("SELECT position FROM videos WHERE id = ?", (params["id"],)).fetchone()
+            if row is None:
+                row = conn.execute("SELECT COALESCE(MAX(position) + 1, 0) AS position FROM videos").fetchone()
+            params["position"] = row["position"]
+            columns = ", ".join(params)
+            values = ", ".join(f":{column}" for column in params)
+            conn.execute(f"INSERT OR REPLACE INTO videos ({columns}) VALUES ({values})", params)
+            self._touch(conn)
+
+    def update(self, video_id: str, **fields) -> dict:
+        """
+        Atualiza campos de um vídeo em uma transação.
+
+        Args:
+            video_id: Id do vídeo
+            **fields: Campos a alterar (ex.: status="published", has_transcription=True)
+
+        Returns:
+            O vídeo atualizado
+        """
+        with self._transaction() as conn:
+            row = conn.execute("SELECT * FROM videos WHERE id = ?", (video_id,)).fetchone()
+            if row is None:
+                raise KeyError(f"Vídeo não encontrado: {video_id}")
+
+            video = _row_to_video(row)
+            video.update(fields)
+            params = _video_to_params(video)
+            assignments = ", ".join(f"{column} = :{column}" for column in params if column != "id")
+            conn.execute(f"UPDATE videos SET {assignments} WHERE id = :id", params)
+            self._touch(conn)
+
+        return video
+
+    def import_json(self, json_path: str = DEFAULT_JSON_PATH) -> int:
+        """
+        Importa o videos_status.json, substituindo o conteúdo atual.
+
+        Returns:
+            Número de vídeos importados
+        """
+        with open(json_path, encoding="utf-8") as f:
+            data = json.load(f)
+
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM videos")
+            for position, video in enumerate(data.get("videos", [])):
+                params = _video_to_params(video)
+                params["position"] = position
+                columns = ", ".join(params)
+                values = ", ".join(f":{column}" for column in params)
+                conn.execute(f"INSERT INTO videos ({columns}) VALUES ({values})", params)
+
+            conn.execute("DELETE FROM meta")
+            for key, value in data.items():
+                if key != "videos":
+                    conn.execute("INSERT INTO meta (key, value) VALUES (?, ?)",
+                                 (key, json.dumps(value, ensure_ascii=False)))
+
+        return len(data.get("videos", []))
+
+    def to_json(self) -> dict:
+        """Conteúdo no formato do videos_status.json."""
+        meta = {
+            row["key"]: json.loads(row["value"])
+            for row in self._connection().execute("SELECT key, value FROM meta")
+        }
+        data = {"last_updated": meta.pop("last_updated", None), "videos": self.list_videos()}
+        data.update(meta)
+        return data
+
+    def export_json(self, json_path: str = DEFAULT_JSON_PATH):
+        """Exporta para um arquivo no formato do videos_status.json."""
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_json(), f, ensure_ascii=False, indent=2)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Uso: python video_status_store.py <comando> [opções]")
+        print()
+        print("Comandos:")
+        print("  import [arquivo.json]             Importar o videos_status.json para o banco")
+        print("  export [arquivo.json]             Exportar o banco no formato do videos_status.json")
+        print("  list [-s status]                  Listar vídeos")
+        print("  next [-n quantidade] [-s status]  Próximos vídeos sem transcrição (padrão: ready)")
+        print("  set <id> campo=valor [...]        Atualizar campos de um vídeo")
+        print()
+        print("Opções:")
+        print(f"  --db <arquivo>                    Banco SQLite (padrão: {DEFAULT_DB_PATH.name})")
+        print()
+        print("Exemplo:")
+        print("  python video_status_store.py set clip_03 status=published youtube_url=https://youtu.be/ID")
+        sys.exit(1)
+
+    command = sys.argv[1]
+    db_path = DEFAULT_DB_PATH
+    status = None
+    limit = 10
+    positional = []
+
+    # Parse argumentos
+    args = sys.argv[2:]
+    i = 0
+    while i < len(args):
+        if args[i] == "--db":
+            db_path = args[i + 1]
+            i += 2
+        elif args[i] in ("-s", "--status"):
+            status = args[i + 1]
+            i += 2
+        elif args[i] in ("-n", "--limit"):
+            limit = int(args[i + 1])
+            i += 2
+        else:
+            positional.append(args[i])
+            i += 1
+
+    store = VideoStatusStore(db_path)
+
+    if command == "import":
+        json_path = positional[0] if positional else DEFAULT_JSON_PATH
+        count = store.import_json(json_path)
+        print(f"{count} vídeos importados de {json_path}")
+    elif command == "export":
+        json_path = positional[0] if positional else DEFAULT_JSON_PATH
+        store.export_json(json_path)
+        print(f"Status exportado para {json_path}")
+    elif command in ("list", "next"):
+        if command == "list":
+            videos = store.list_videos(status)
+        else:
+            videos = store.next_missing_transcription(limit, (status,) if status else ("ready",))
+        for video in videos:
+            print(f"{video['id']:<12} {video['status']:<10} {video['title']}")
+    elif command == "set":
+        if len(positional) < 2:
+            print("Uso: python video_status_store.py set <id> campo=valor [...]")
+            sys.exit(1)
+        fields = {}
+        for assignment in positional[1:]:
+            field, _, value = assignment.partition("=")
+            # Valores no formato JSON (true, null, números); senão texto puro
+            try:
+                fields[field] = json.loads(value)
+            except ValueError:
+                fields[field] = value
+        video = store.update(positional[0], **fields)
+        print(json.dumps(video, ensure_ascii=False, indent=2))
+    else:
+        print(f"Comando desconhecido: {command}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()